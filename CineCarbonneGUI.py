@@ -1,17 +1,20 @@
 import tkinter
 from tkinter import ttk,filedialog
 import os
+import queue
 import shutil
+import threading
+import time
 from tkinter.constants import HORIZONTAL
 
-#Local Import
-import normalize
-import enrich
-import excel_to_json
+#Local Import : les modules d'étape (pandas, requests, ...) sont importés
+#à la demande dans convert() pour que la fenêtre s'affiche immédiatement
+import journal
+import manifest
+import profiling
 
 TMDB_API_KEY=os.getenv ("TMDB_API_KEY","4b400d47b0a36eed006040846feebaf5")
 
-print("API_KEY: "+os.environ.get("TMDB_API_KEY", "").strip())
 selected_program_file=""
 
 mode_standalone=os.path.isfile("./CineCarbonneGUI.exe")
@@ -32,6 +35,14 @@ if not os.path.isdir("work") :
 if not os.path.isdir("public") :
     os.mkdir("public")
 
+# Le pipeline tourne dans un thread de travail ; il ne touche jamais Tk directement
+# mais poste des évènements dans ui_queue, traités par poll_ui() sur le thread Tk.
+ui_queue = queue.Queue()
+cancel_event = threading.Event()
+worker = None
+stage_options = {}      # options cochées, figées au lancement de convert()
+pending_reply = None    # réponse attendue par le worker pour une sélection en cours
+
 
 # Function for opening the
 # file explorer window
@@ -46,8 +57,12 @@ def browseFiles():
 
     # Change label contents
     label_file_explorer.configure(text=selected_program_file)
+    if selected_program_file:
+        # nouveau programme : la chaîne est à relancer (chaque étape se passe si rien n'a changé)
+        for stage in ("normalize", "enrich", "export"):
+            options[stage].set(True)
 
-def error_popup(message):
+def error_popup(message, wait=True):
     alert_window = tkinter.Toplevel(window)
     alert_window.title("Erreur")
     #alert_window.geometry("300x200")
@@ -65,11 +80,107 @@ def error_popup(message):
     window.update()
     window.update_idletasks()
 
-    window.wait_window(alert_window)
+    if wait:
+        window.wait_window(alert_window)
+
+def show_select_dialog(title, choices, reply):
+    """Fenêtre de choix (thread Tk) ; la réponse 0 (aucun) .. n est postée dans reply."""
+    global pending_reply
+    pending_reply = reply
+    window.attributes("-topmost", True)
+
+    new_window = tkinter.Toplevel(window)
+    new_window.title("selection : %s" %title)
+    hauteur=str(30*len(choices)+20)
+    new_window.geometry("600x%s" %hauteur)
+
+    choice=tkinter.IntVar(new_window, value = 0  )
+
+    def answer(value):
+        global pending_reply
+        if pending_reply is reply:
+            pending_reply = None
+            reply.put(value)
+        new_window.destroy()
+
+    var=1
+    for c in choices:
+        ttk.Radiobutton(new_window, text=c, variable=choice, value=var).pack(fill='x')
+        var+=1
+    tkinter.Button(new_window, text="Valider/Passer", command=lambda: answer(choice.get())).pack()
+    new_window.protocol("WM_DELETE_WINDOW", lambda: answer(0))
+    #force display
+    window.attributes("-topmost", False)
+    new_window.attributes("-topmost", True)
+
+def worker_select_movie(title, choices):
+    """Callback de sélection pour enrich, appelé depuis le thread de travail."""
+    if cancel_event.is_set():
+        return 0
+    reply = queue.Queue(maxsize=1)
+    ui_queue.put(("select", title, choices, reply))
+    return reply.get()
+
+def worker_progress(done, total, title):
+    ui_queue.put(("progress", done, total, title))
+
+def run_stage(stage, func, *args):
+    # profilage cProfile optionnel (case "profilage")
+    if stage_options["profile"]:
+        return profiling.run(stage, func, *args)
+    return func(*args)
+
+def format_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60} min {seconds % 60:02d} s" if seconds >= 60 else f"{seconds} s"
+
+def poll_ui():
+    """Traite les évènements postés par le thread de travail (thread Tk uniquement)."""
+    try:
+        while True:
+            event = ui_queue.get_nowait()
+            kind = event[0]
+            if kind == "progress":
+                _, done, total, title = event
+                progress_bar.configure(maximum=max(total, 1), value=done)
+                text = f"{done}/{total}"
+                if done and total:
+                    elapsed = time.monotonic() - progress_state["t0"]
+                    text += f"  —  reste ~{format_eta(elapsed / done * (total - done))}"
+                if title:
+                    text += f"  —  {title}"
+                progress_label.configure(text=text)
+            elif kind == "stage":
+                progress_state["t0"] = time.monotonic()
+                progress_bar.configure(value=0)
+                progress_label.configure(text=event[1])
+            elif kind == "select":
+                _, title, choices, reply = event
+                show_select_dialog(title, choices, reply)
+            elif kind == "error":
+                error_popup(event[1], wait=False)
+            elif kind == "done":
+                button_convert.configure(state="normal")
+                button_cancel.configure(state="disabled")
+                progress_label.configure(text=event[1])
+    except queue.Empty:
+        pass
+    window.after(100, poll_ui)
+
+def cancel():
+    """Demande l'arrêt : l'étape en cours s'arrête proprement en gardant le travail fait."""
+    global pending_reply
+    cancel_event.set()
+    progress_label.configure(text="annulation en cours ...")
+    if pending_reply is not None:
+        pending_reply.put(0)
+        pending_reply = None
 
 def convert():
+    global worker, stage_options
+    if worker is not None and worker.is_alive():
+        return
     print(f"Répertoire courant début convert: {os.getcwd()}")
-    continu = True
     if selected_program_file != "":
         print ("Copy selected file to input/source.xlsx")
         shutil.copy(selected_program_file,INPUT_PATH)
@@ -77,42 +188,89 @@ def convert():
         error_popup("ATTENTION : pas de fichier d'entrée selectionné \n"
                     "=> le fichier input/source.xlsx sera utilisé si existant!! ")
 
-    if options["normalize"].get():
+    # les variables Tk ne se lisent que depuis le thread Tk : on les fige ici
+    stage_options = {k: v.get() for k, v in options.items()}
+    cancel_event.clear()
+    button_convert.configure(state="disabled")
+    button_cancel.configure(state="normal")
+    worker = threading.Thread(target=run_pipeline, daemon=True)
+    worker.start()
+
+def run_pipeline():
+    """Thread de travail : enchaîne les étapes cochées."""
+    try:
+        status = pipeline_steps()
+    except (Exception, SystemExit) as e:
+        print(f"[erreur] {e}")
+        ui_queue.put(("error", f"Erreur pendant le traitement :\n{e}"))
+        status = "erreur"
+    ui_queue.put(("done", status))
+
+def pipeline_steps():
+    continu = True
+    if stage_options["normalize"]:
         print(f"Répertoire courant début normalize: {os.getcwd()}")
         if os.path.isfile("input/source.xlsx"):
             print ("Normalize")
-            normalize.main()
+            ui_queue.put(("stage", "normalisation ..."))
+            import normalize
+            run_stage("normalize", normalize.main, stage_options["force"])
         else :
-            error_popup("le fichier input/source.xlsx n'existe pas\n"
-                        "veuillez sélectionner le fichier programme source à l'aide du bouton prévu a cet effet")
+            ui_queue.put(("error", "le fichier input/source.xlsx n'existe pas\n"
+                        "veuillez sélectionner le fichier programme source à l'aide du bouton prévu a cet effet"))
             continu=False
 
+    if cancel_event.is_set():
+        return "annulé"
 
-
-    if continu and options["enrich"].get():
+    if continu and stage_options["enrich"]:
         print(f"Répertoire courant début enrich: {os.getcwd()}")
         if os.path.isfile("work/normalized.xlsx"):
-            print("ajout TMDB data witk key %s __" % input_TMDB.get('1.0', "end"))
+            print("ajout TMDB data")
             os.environ["TMDB_API_KEY"] = TMDB_API_KEY
-            print("API_KEY 2: " + os.environ.get("TMDB_API_KEY", ""))
-            enrich.main(window)
+            ui_queue.put(("stage", "enrichissement ..."))
+            import enrich
+            enrich_argv = ["--resume"] if stage_options["resume"] else []
+            enrich_argv += ["--force"] if stage_options["force"] else []
+            run_stage("enrich", enrich.main, enrich_argv, worker_select_movie, os.getcwd(),
+                      worker_progress, cancel_event)
         else :
-            error_popup("le fichier work/normalized.xlsx n'existe pas\n/"
-                        "veuillez sélectionner  l'option 'normalize' dans l'interface")
+            ui_queue.put(("error", "le fichier work/normalized.xlsx n'existe pas\n/"
+                        "veuillez sélectionner  l'option 'normalize' dans l'interface"))
             continu=False
 
-    if continu and options["export"].get():
+    if cancel_event.is_set():
+        # les lignes déjà enrichies ont été écrites dans work/enriched.xlsx
+        return "annulé (travail effectué conservé)"
+
+    if continu and stage_options["export"]:
         print(f"Répertoire courant début export: {os.getcwd()}")
         if os.path.isfile("work/enriched.xlsx"):
             print ("convert to json")
-            excel_to_json.main()
+            ui_queue.put(("stage", "export json ..."))
+            import excel_to_json
+            run_stage("export", excel_to_json.main, stage_options["force"])
         else:
-            error_popup("le fichier work/enriched.xlsx n'existe pas\n/"
+            ui_queue.put(("error", "le fichier work/enriched.xlsx n'existe pas\n/"
                         "export json Impossible!"
-                        "veuillez sélectionner  l'option 'enrich' dans l'interface")
+                        "veuillez sélectionner  l'option 'enrich' dans l'interface"))
+            continu=False
 
         print (" TBD .. move to site GitHub (and Commit ? )")
 
+    if continu and stage_options["images"] and not cancel_event.is_set():
+        if os.path.isfile("public/data/programme.json"):
+            print ("cache local des images")
+            ui_queue.put(("stage", "images locales ..."))
+            import images
+            run_stage("images", images.main, ["--force"] if stage_options["force"] else [])
+        else:
+            ui_queue.put(("error", "le fichier public/data/programme.json n'existe pas\n/"
+                        "veuillez sélectionner  l'option 'export' dans l'interface"))
+            continu=False
+
+    return "terminé" if continu else "interrompu"
+
 # Create the root window
 window = tkinter.Tk()
 
@@ -124,7 +282,7 @@ ttk.Style().configure("TLabel", font=("helvetica", 12), padding=6)
 window.title('CinéCarbonne - Site - Programme')
 
 # Set window size
-window.geometry("800x250")
+window.geometry("800x340")
 
 # Set window background color
 #window.config(background="lightgrey")
@@ -150,21 +308,47 @@ input_TMDB.insert(1.0,TMDB_API_KEY)
 #checkBoxe pour le  choix des etapes de conversion
 options = {"normalize": tkinter.BooleanVar(),
            "enrich": tkinter.BooleanVar(),
-           "export": tkinter.BooleanVar()}
-
-options["normalize"].set(True)
-options["enrich"].set(os.path.isfile('work/normalized.xlsx'))
-options["export"].set(False)
+           "export": tkinter.BooleanVar(),
+           "images": tkinter.BooleanVar(),
+           "profile": tkinter.BooleanVar(),
+           "resume": tkinter.BooleanVar(),
+           "force": tkinter.BooleanVar()}
+
+# étapes pré-cochées d'après les manifestes (work/manifests) : seules celles dont
+# les entrées, le code ou la date ont changé depuis la dernière exécution
+stale = manifest.stale_stages()
+options["normalize"].set("normalize" in stale)
+options["enrich"].set("enrich" in stale)
+options["export"].set("export" in stale)
+# images : étape optionnelle, cochée seulement si elle a déjà été utilisée
+options["images"].set("images" in stale and manifest.for_stage("images").load() is not None)
+options["profile"].set(False)
+options["resume"].set(journal.is_incomplete("work/enrich_journal.jsonl"))
+options["force"].set(False)
 
 normalizeRB = ttk.Checkbutton(window, text="normalisation du fichier Excell brut ", variable=options["normalize"])
 enrichRB = ttk.Checkbutton(window, text="enrichissement auto (synopsis, Lien allociné,..) ", variable=options["enrich"])
 exportRB = ttk.Checkbutton(window, text="export Site CineCarbonne", variable=options["export"])
+imagesRB = ttk.Checkbutton(window, text="images locales (WebP/AVIF)", variable=options["images"])
+resumeRB = ttk.Checkbutton(window, text="reprendre (journal)", variable=options["resume"])
+profileRB = ttk.Checkbutton(window, text="profilage (work/profiles)", variable=options["profile"])
+forceRB = ttk.Checkbutton(window, text="forcer (même si inchangé)", variable=options["force"])
 
 #Bouuton pour lancer la conversion du fichier d'entrée
 button_convert = ttk.Button(window,
                      text="convert",
                      command=convert)
 
+button_cancel = ttk.Button(window,
+                     text="Annuler",
+                     command=cancel,
+                     state="disabled")
+
+# progression : lignes faites / total, temps restant estimé, film en cours
+progress_state = {"t0": time.monotonic()}
+progress_bar = ttk.Progressbar(window, orient=HORIZONTAL, mode="determinate", length=500)
+progress_label = ttk.Label(window, text="", style="BW.TLabel", width=70)
+
 button_quit = ttk.Button(window,
                      text="Quit",
                      command=window.destroy)
@@ -184,9 +368,17 @@ normalizeRB.grid(column=2,row=4,sticky="w", pady=5)
 ttk.Separator(window, orient=HORIZONTAL).grid(column=1, row=5, columnspan=5, pady=5, sticky="we"  )
 enrichRB.grid(column=2,row=6,sticky="w")
 exportRB.grid(column=2,row=7,sticky="w")
+imagesRB.grid(column=2,row=8,sticky="w")
+profileRB.grid(column=3,row=8,sticky="w")
+resumeRB.grid(column=4,row=7,sticky="w")
+forceRB.grid(column=4,row=8,sticky="w")
 button_convert.grid(column=3, row=6, padx=5, pady=10)
+button_cancel.grid(column=3, row=7, padx=5, pady=5)
 button_quit.grid(column=4, row=6, padx=5, pady=10)
+progress_bar.grid(column=1, row=9, columnspan=4, padx=15, pady=5, sticky="we")
+progress_label.grid(column=1, row=10, columnspan=4, padx=15, sticky="w")
 
 window.attributes("-topmost", True)
+window.after(100, poll_ui)
 window.mainloop()
 
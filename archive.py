@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+archive.py — Archive mensuelle des séances passées (public/data/archive/AAAA-MM.json).
+
+- excel_to_json y déplace les séances passées au lieu de les supprimer ;
+  programme.json ne garde que les séances à venir
+- Une partition = un tableau JSON valide, un objet par ligne (lisible tel quel par le site)
+- Lecture en flux : iter_items() décode objet par objet (json.raw_decode sur des blocs
+  de 64 Ko), iter_archive() enchaîne les mois : historique et statistiques
+  sans jamais tout charger en mémoire
+- Une écriture ne charge que la partition du mois concerné
+
+Usage : python archive.py [--from 2024-09] [--to 2025-06]   (statistiques par mois et par film)
+"""
+
+import argparse, json, os
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+ARCHIVE_DIR = Path("public/data/archive")
+CHUNK_SIZE = 1 << 16
+_SEPARATORS = " \t\r\n,[]"
+
+
+def partition_path(month: str, archive_dir: Path = ARCHIVE_DIR) -> Path:
+    return Path(archive_dir) / f"{month}.json"
+
+
+def months(archive_dir: Path = ARCHIVE_DIR) -> List[str]:
+    """Mois archivés (AAAA-MM), dans l'ordre chronologique."""
+    return sorted(p.stem for p in Path(archive_dir).glob("[0-9][0-9][0-9][0-9]-[0-9][0-9].json"))
+
+
+def iter_items(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Objets d'un tableau JSON, décodés un à un sans charger le fichier entier."""
+    decoder = json.JSONDecoder()
+    buf, pos = "", 0
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            # séparateurs entre objets : blancs, virgules, crochets du tableau
+            while pos < len(buf) and buf[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(buf):
+                buf, pos = f.read(chunk_size), 0
+                if not buf:
+                    return
+                continue
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # objet coupé en fin de bloc : on lit la suite
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield obj
+            pos = end
+
+
+def iter_archive(first: str = None, last: str = None, archive_dir: Path = ARCHIVE_DIR) -> Iterator[dict]:
+    """Séances archivées des mois [first, last] (AAAA-MM, bornes incluses), en flux."""
+    for month in months(archive_dir):
+        if (first and month < first) or (last and month > last):
+            continue
+        yield from iter_items(partition_path(month, archive_dir))
+
+
+def write_partition(month: str, items: list, archive_dir: Path = ARCHIVE_DIR):
+    path = partition_path(month, archive_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        sep = ""
+        for obj in items:
+            f.write(sep + json.dumps(obj, ensure_ascii=False))
+            sep = ",\n"
+        f.write("\n]\n")
+    os.replace(tmp, path)
+
+
+def merge_into(month: str, items: list, key: Callable[[dict], str],
+               sort: Callable[[list], list], archive_dir: Path = ARCHIVE_DIR) -> int:
+    """Ajoute items à la partition du mois (même clé : la nouvelle version gagne)."""
+    path = partition_path(month, archive_dir)
+    merged = {}
+    if path.exists():
+        for obj in iter_items(path):
+            merged[key(obj)] = obj
+    for obj in items:
+        merged[key(obj)] = obj
+    write_partition(month, sort(list(merged.values())), archive_dir)
+    return len(merged)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Statistiques sur l'archive des séances")
+    p.add_argument("--from", dest="first", default=None, help="premier mois (AAAA-MM)")
+    p.add_argument("--to", dest="last", default=None, help="dernier mois (AAAA-MM)")
+    p.add_argument("--top", type=int, default=10)
+    args = p.parse_args(argv)
+
+    per_month, per_film = Counter(), Counter()
+    for obj in iter_archive(args.first, args.last):
+        per_month[(obj.get("date") or "")[:7] or "?"] += 1
+        per_film[obj.get("titre") or "?"] += 1
+
+    print(f"=== Archive ({ARCHIVE_DIR}) : {sum(per_month.values())} séances ===")
+    for month in sorted(per_month):
+        print(f"  {month}  {per_month[month]:>5}")
+    print(f"--- {args.top} films les plus programmés ---")
+    for titre, n in per_film.most_common(args.top):
+        print(f"  {n:>5}  {titre}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout : normalize → enrich (TMDB stub) → excel_to_json.
+
+- Génère un classeur synthétique par taille (100 / 1k / 10k / 100k lignes par défaut)
+- Chaque étape tourne dans un processus séparé (mesure de pic mémoire propre à l'étape)
+- Affiche durée, débit (lignes/s) et pic mémoire, comparés à bench/baseline.json
+- Une étape qui plante ou dépasse --stage-timeout arrête le banc (pas d'attente infinie)
+- bench/baseline.json : à régénérer (--save-baseline, toutes les tailles) dans le même commit
+  que tout changement volontaire de coût d'une étape, sinon la comparaison signale à tort
+  des régressions (ou les masque)
+
+Usage :
+    python -m bench.run_bench                      # toutes les tailles
+    python -m bench.run_bench --sizes 100,1000     # sous-ensemble
+    python -m bench.run_bench --save-baseline      # enregistre la référence
+"""
+
+import argparse, contextlib, io, json, multiprocessing as mp, os, queue, shutil, sys, tempfile, time
+from pathlib import Path
+
+BENCH_DIR     = Path(__file__).resolve().parent
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+STAGES        = ("normalize", "enrich", "export")
+STAGE_TIMEOUT = 3600      # secondes par étape
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _count_rows(path: Path) -> int:
+    import pandas as pd
+    return len(pd.read_excel(path, dtype=str))
+
+
+def _run_stage(stage: str, workdir: str, latency: float, q):
+    os.chdir(workdir)
+    work = Path(workdir) / "work"
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage == "normalize":
+            import normalize
+            run = normalize.main
+        elif stage == "enrich":
+            import enrich
+            from bench import stub_tmdb
+            stub_tmdb.install(enrich.get_session(), latency=latency)
+            enrich.TMDB_API_KEY = "bench"
+            argv = ["--in", str(work / "normalized.xlsx"), "--out", str(work / "enriched.xlsx")]
+            # root : journal, catalogue et manifeste dans le répertoire du banc, jamais dans work/ du dépôt
+            run = lambda: enrich.main(argv=argv, root=workdir)
+        else:
+            import excel_to_json
+            run = excel_to_json.main
+        t0 = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - t0
+    src = work / ("normalized.xlsx" if stage != "export" else "enriched.xlsx")
+    q.put({"seconds": round(seconds, 3), "rows": _count_rows(src), "peak_mb": _peak_rss_mb()})
+
+
+def _wait_result(stage: str, proc, q, timeout: float) -> dict:
+    """Résultat d'une étape ; RuntimeError si le processus meurt sans résultat ou dépasse timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return q.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if not proc.is_alive():
+            try:    # résultat déposé juste avant la fin du processus
+                return q.get(timeout=1.0)
+            except queue.Empty:
+                raise RuntimeError(f"étape {stage} : processus terminé sans résultat (code {proc.exitcode})")
+        if time.monotonic() > deadline:
+            proc.terminate()
+            proc.join()
+            raise RuntimeError(f"étape {stage} : pas de résultat après {timeout:g} s")
+
+
+def run_size(n_rows: int, latency: float = 0.0, keep: bool = False, timeout: float = STAGE_TIMEOUT) -> dict:
+    from bench.synth import generate
+    workdir = Path(tempfile.mkdtemp(prefix=f"cc-bench-{n_rows}-"))
+    try:
+        generate(workdir / "input" / "source.xlsx", n_rows)
+        ctx = mp.get_context("spawn")
+        results = {}
+        for stage in STAGES:
+            q = ctx.Queue()
+            proc = ctx.Process(target=_run_stage, args=(stage, str(workdir), latency, q))
+            proc.start()
+            res = _wait_result(stage, proc, q, timeout)
+            proc.join()
+            if proc.exitcode != 0:
+                raise RuntimeError(f"étape {stage} : code de sortie {proc.exitcode}")
+            rows_in = n_rows if stage == "normalize" else res["rows"]
+            res["rows_per_s"] = round(rows_in / res["seconds"], 1) if res["seconds"] else None
+            results[stage] = res
+        return results
+    finally:
+        if keep:
+            print(f"[info] répertoire conservé : {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def load_baseline() -> dict:
+    if BASELINE_PATH.exists():
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def report(all_results: dict, baseline: dict, tolerance: float) -> int:
+    regressions = 0
+    print(f"\n{'lignes':>8} {'étape':<10} {'rows':>7} {'sec':>9} {'rows/s':>10} {'pic MB':>8}  vs réf.")
+    for size, stages in all_results.items():
+        for stage, r in stages.items():
+            ref = baseline.get(str(size), {}).get(stage)
+            cmp = ""
+            if ref and ref.get("seconds"):
+                ratio = r["seconds"] / ref["seconds"]
+                cmp = f"x{ratio:.2f}"
+                if ratio > tolerance:
+                    cmp += "  REGRESSION"
+                    regressions += 1
+            print(f"{size:>8} {stage:<10} {r['rows']:>7} {r['seconds']:>9.3f} "
+                  f"{r['rows_per_s'] or 0:>10.1f} {r['peak_mb'] or 0:>8.1f}  {cmp}")
+    return regressions
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Benchmark du pipeline Ciné Carbonne")
+    p.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    p.add_argument("--latency", type=float, default=0.0, help="latence simulée par requête TMDB (s)")
+    p.add_argument("--tolerance", type=float, default=1.25, help="ratio au-delà duquel on signale une régression")
+    p.add_argument("--save-baseline", action="store_true")
+    p.add_argument("--keep", action="store_true", help="conserver les répertoires de travail")
+    p.add_argument("--stage-timeout", dest="stage_timeout", type=float, default=STAGE_TIMEOUT,
+                   help="secondes au plus par étape")
+    args = p.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    all_results = {}
+    for n in sizes:
+        print(f"[info] {n} lignes ...")
+        try:
+            all_results[n] = run_size(n, latency=args.latency, keep=args.keep, timeout=args.stage_timeout)
+        except RuntimeError as e:
+            print(f"[erreur] {n} lignes : {e}")
+            return 2
+
+    baseline = load_baseline()
+    regressions = report(all_results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update({str(k): v for k, v in all_results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"[done] référence écrite : {BASELINE_PATH}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Stub TMDB / Wikidata pour les benchmarks : un adaptateur `requests` qui répond
+localement (réponses déterministes dérivées du titre ou de l'id, aucun réseau).
+
+Une recherche renvoie un seul candidat → sélection automatique, jamais de prompt.
+"""
+
+import hashlib, json, time
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import BaseAdapter
+
+
+def _film_id(query: str) -> int:
+    return int(hashlib.sha1(query.encode("utf-8")).hexdigest()[:7], 16)
+
+
+def tmdb_payload(path: str, params: dict) -> dict:
+    parts = [p for p in path.split("/") if p]     # ["3", "movie", "123", "credits"]
+    if parts[1:3] == ["search", "movie"]:
+        q = params.get("query", "")
+        return {"results": [{"id": _film_id(q), "title": q, "original_title": q,
+                             "release_date": "2024-05-01", "popularity": 12.0}]}
+    if parts[1] == "find":
+        return {"movie_results": [{"id": int(parts[2][2:])}]}
+    mid = int(parts[2])
+    tail = parts[3] if len(parts) > 3 else ""
+    if tail == "credits":
+        return {"cast": [{"name": f"Acteur {mid % 97} {i}"} for i in range(8)],
+                "crew": [{"name": f"Réal {mid % 89}", "job": "Director"}]}
+    if tail == "videos":
+        return {"results": [{"site": "YouTube", "type": "Trailer", "key": f"k{mid}"}]}
+    if tail == "images":
+        return {"backdrops": [{"file_path": f"/b{mid}_{i}.jpg", "width": 1920,
+                               "vote_average": 5 - i, "vote_count": 10} for i in range(6)]}
+    return {"id": mid, "title": f"Film {mid}", "original_title": f"Film {mid}",
+            "release_date": "2024-05-01", "runtime": 100 + mid % 60,
+            "overview": "Synopsis synthétique. " * 8, "poster_path": f"/p{mid}.jpg",
+            "backdrop_path": f"/b{mid}.jpg", "imdb_id": f"tt{mid:07d}",
+            "genres": [{"name": "Drame"}], "production_countries": [{"name": "France"}]}
+
+
+def sparql_payload(params: dict) -> dict:
+    return {"results": {"bindings": [{"allo": {"value": str(len(params.get("query", "")))}}]}}
+
+
+class StubAdapter(BaseAdapter):
+    """Répond aux GET TMDB / Wikidata ; `latency` (s) simule l'aller-retour réseau."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        u = urlparse(request.url)
+        params = {k: v[0] for k, v in parse_qs(u.query).items()}
+        payload = sparql_payload(params) if "wikidata" in u.netloc else tmdb_payload(u.path, params)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps(payload).encode("utf-8")
+        resp.headers["Content-Type"] = "application/json"
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        return resp
+
+    def close(self):
+        pass
+
+
+def install(session, latency: float = 0.0) -> StubAdapter:
+    adapter = StubAdapter(latency=latency)
+    for prefix in set(session.adapters) | {"http://", "https://"}:
+        session.mount(prefix, adapter)
+    return adapter
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Générateur de classeurs "programme" synthétiques (même disposition que Feuil1).
+
+- A : jour de la semaine ("Semaine" en tête de semaine), B : date
+- C : heure ("21h", "20h30"), E : titre (fond rouge = séance annulée),
+  F..L : version, CM, réalisateur, prix, catégorie, tarif, commentaire
+- blocs "Prochainement" (ligne titre seule + ligne suivante = liste de films)
+
+Usage : python -m bench.synth 1000 input/source.xlsx
+"""
+
+import random, sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill
+
+SHEET_NAME = "Feuil1"
+WEEKDAYS   = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
+HOURS      = ["14h30", "15h", "16h", "17h", "18h", "20h30", "21h"]
+VERSIONS   = [None, None, None, "VO", "VOSTFR", "VF"]
+CATEGORIES = [None, None, None, "JP", "Ciné goûter JP", "DOC", "SCOL"]
+TARIFS     = [None, None, "TU 5 €", "ADH 4 € - Autres 5 €", "TU 3 €"]
+COMMENTS   = [None, None, "Coup de cœur", "Découverte", "2h40 - Coup de cœur"]
+WORDS      = ["nuit", "étoile", "forêt", "retour", "chant", "voyage", "mer", "secret",
+              "ombre", "jardin", "lumière", "hiver", "frère", "dernier", "rêve", "ville"]
+
+RED_FILL = PatternFill(fill_type="solid", fgColor="FFFF0000")
+
+
+def film_titles(n_films: int, rng: random.Random):
+    titles = set()
+    while len(titles) < n_films:
+        k = rng.randint(1, 3)
+        titles.add(" ".join(rng.choice(WORDS) for _ in range(k)).capitalize() + f" {len(titles)}")
+    return sorted(titles)
+
+
+def iter_sheet_rows(n_rows: int, seed: int = 0, red_ratio: float = 0.05,
+                    prochainement_every: int = 400, start: date = None):
+    """Produit ~n_rows lignes (listes de 12 valeurs + drapeau 'titre rouge')."""
+    rng = random.Random(seed)
+    titles = film_titles(max(5, n_rows // 8), rng)
+    day = start or date.today()
+    produced = 0
+    next_block = prochainement_every
+    while produced < n_rows:
+        if day.weekday() == 2 or produced == 0:
+            yield ["Semaine", day, None, None, None, None, None, None, None, None, None, None], False
+            produced += 1
+        yield [WEEKDAYS[day.weekday()], day] + [None] * 10, False
+        produced += 1
+        for h in sorted(rng.sample(HOURS, rng.randint(1, 3)), key=HOURS.index):
+            row = [None, None, h, None, rng.choice(titles), rng.choice(VERSIONS),
+                   rng.choice([None, None, "CM1"]), None, None,
+                   rng.choice(CATEGORIES), rng.choice(TARIFS), rng.choice(COMMENTS)]
+            yield row, rng.random() < red_ratio
+            produced += 1
+        if prochainement_every and produced >= next_block:
+            yield [None] * 4 + ["Prochainement"] + [None] * 7, False
+            yield [None] * 4 + [", ".join(rng.sample(titles, 4))] + [None] * 7, False
+            produced += 2
+            next_block += prochainement_every
+        day += timedelta(days=1)
+
+
+def generate(path, n_rows: int, seed: int = 0, **kw) -> Path:
+    """Écrit un classeur synthétique (mode write-only : tient les 100k lignes)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    for values, red in iter_sheet_rows(n_rows, seed=seed, **kw):
+        if red:
+            cell = WriteOnlyCell(ws, value=values[4])
+            cell.fill = RED_FILL
+            values = values[:4] + [cell] + values[5:]
+        ws.append(values)
+    wb.save(path)
+    return path
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    out = sys.argv[2] if len(sys.argv) > 2 else "input/source.xlsx"
+    print(f"[done] écrit: {generate(out, n)}  ({n} lignes)")
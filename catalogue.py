@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+catalogue.py — Catalogue local SQLite (work/catalogue.sqlite) : films, séances, décisions.
+
+Tables
+    films       une ligne par film (clé tmdb_id) : titres, année, durée, synopsis, URLs
+    personnes   réalisateurs / acteurs par film, dans l'ordre TMDB
+    genres, pays, images (backdrops)  valeurs structurées, dans l'ordre
+    titres      titre de recherche (clé film_store.key_of) → tmdb_id
+    decisions   titres ambigus : candidats en attente, puis choix de l'opérateur
+    seances     séances du dernier enrichissement (ordre du classeur) → tmdb_id
+Index : films(titre), films(imdb_id), seances(date), seances(tmdb_id)
+
+- Vues films_plats / programme : champs aplatis au format du classeur enrichi
+  ("A, B", backdrops en tableau JSON) ; l'export est une seule requête (PROGRAMME_SQL)
+- enrich, stream et watch y écrivent films et séances, refresh.py les fiches mises à jour ;
+  un film déjà connu (titre ou id) est une requête indexée locale au lieu d'un appel TMDB
+  (cf. film_store.py)
+- Une connexion par Catalogue, partagée entre threads sous verrou ; WAL (lecteurs non bloqués)
+- stdlib uniquement (sqlite3)
+
+Usage : python catalogue.py [--film 603] [--titre "matrix"] [--date 2025-03-01]
+"""
+
+import argparse, json, sqlite3, threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from model import Film, film_from_dict, film_to_dict
+
+CATALOGUE_PATH = Path("work/catalogue.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS films (
+    tmdb_id        INTEGER PRIMARY KEY,
+    imdb_id        TEXT NOT NULL DEFAULT '',
+    titre          TEXT NOT NULL DEFAULT '',
+    titre_original TEXT NOT NULL DEFAULT '',
+    annee          TEXT NOT NULL DEFAULT '',
+    duree_min      TEXT NOT NULL DEFAULT '',
+    synopsis       TEXT NOT NULL DEFAULT '',
+    affiche_url    TEXT NOT NULL DEFAULT '',
+    backdrop_url   TEXT NOT NULL DEFAULT '',
+    trailer_url    TEXT NOT NULL DEFAULT '',
+    allocine_url   TEXT NOT NULL DEFAULT '',
+    a_completer    TEXT NOT NULL DEFAULT '',
+    maj            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS films_titre ON films(titre COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS films_imdb ON films(imdb_id);
+
+CREATE TABLE IF NOT EXISTS personnes (
+    tmdb_id INTEGER NOT NULL REFERENCES films(tmdb_id) ON DELETE CASCADE,
+    role    TEXT NOT NULL,              -- 'realisateur' | 'acteur'
+    rang    INTEGER NOT NULL,
+    nom     TEXT NOT NULL,
+    PRIMARY KEY (tmdb_id, role, rang)
+);
+CREATE TABLE IF NOT EXISTS genres (
+    tmdb_id INTEGER NOT NULL REFERENCES films(tmdb_id) ON DELETE CASCADE,
+    rang    INTEGER NOT NULL,
+    nom     TEXT NOT NULL,
+    PRIMARY KEY (tmdb_id, rang)
+);
+CREATE TABLE IF NOT EXISTS pays (
+    tmdb_id INTEGER NOT NULL REFERENCES films(tmdb_id) ON DELETE CASCADE,
+    rang    INTEGER NOT NULL,
+    nom     TEXT NOT NULL,
+    PRIMARY KEY (tmdb_id, rang)
+);
+CREATE TABLE IF NOT EXISTS images (
+    tmdb_id INTEGER NOT NULL REFERENCES films(tmdb_id) ON DELETE CASCADE,
+    type    TEXT NOT NULL,              -- 'backdrop'
+    rang    INTEGER NOT NULL,
+    url     TEXT NOT NULL,
+    PRIMARY KEY (tmdb_id, type, rang)
+);
+
+CREATE TABLE IF NOT EXISTS titres (
+    cle     TEXT PRIMARY KEY,
+    tmdb_id INTEGER NOT NULL REFERENCES films(tmdb_id) ON DELETE CASCADE,
+    origine TEXT NOT NULL DEFAULT '',
+    maj     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS decisions (
+    cle          TEXT PRIMARY KEY,
+    titre        TEXT NOT NULL,
+    recherche    TEXT NOT NULL,
+    annee_indice TEXT NOT NULL DEFAULT '',
+    statut       TEXT NOT NULL,         -- 'en_attente' | 'choisi'
+    candidats    TEXT NOT NULL DEFAULT '[]',
+    tmdb_id      INTEGER,
+    ajoute       TEXT NOT NULL,
+    decide       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS seances (
+    ordre          INTEGER PRIMARY KEY,
+    datetime_local TEXT NOT NULL DEFAULT '',
+    date           TEXT NOT NULL DEFAULT '',
+    heure          TEXT NOT NULL DEFAULT '',
+    version        TEXT NOT NULL DEFAULT '',
+    tarif          TEXT NOT NULL DEFAULT '',
+    prix           TEXT NOT NULL DEFAULT '',
+    categorie      TEXT NOT NULL DEFAULT '',
+    commentaire    TEXT NOT NULL DEFAULT '',
+    evenement      TEXT NOT NULL DEFAULT '',
+    titre          TEXT NOT NULL DEFAULT '',   -- film non résolu : titre / réalisateur du classeur
+    realisateur    TEXT NOT NULL DEFAULT '',
+    imdb_id        TEXT NOT NULL DEFAULT '',
+    tmdb_id        INTEGER
+);
+CREATE INDEX IF NOT EXISTS seances_date ON seances(date);
+CREATE INDEX IF NOT EXISTS seances_film ON seances(tmdb_id);
+
+CREATE VIEW IF NOT EXISTS films_plats AS
+SELECT f.*,
+    COALESCE((SELECT group_concat(nom, ', ') FROM (SELECT nom FROM personnes p
+              WHERE p.tmdb_id = f.tmdb_id AND p.role = 'realisateur' ORDER BY rang)), '') AS realisateur,
+    COALESCE((SELECT group_concat(nom, ', ') FROM (SELECT nom FROM personnes p
+              WHERE p.tmdb_id = f.tmdb_id AND p.role = 'acteur' ORDER BY rang)), '') AS acteurs_principaux,
+    COALESCE((SELECT group_concat(nom, ', ') FROM (SELECT nom FROM genres g
+              WHERE g.tmdb_id = f.tmdb_id ORDER BY rang)), '') AS genres,
+    COALESCE((SELECT group_concat(nom, ', ') FROM (SELECT nom FROM pays c
+              WHERE c.tmdb_id = f.tmdb_id ORDER BY rang)), '') AS pays,
+    (SELECT json_group_array(url) FROM (SELECT url FROM images i
+              WHERE i.tmdb_id = f.tmdb_id AND i.type = 'backdrop' ORDER BY rang)) AS backdrops
+FROM films f;
+
+CREATE VIEW IF NOT EXISTS programme AS
+SELECT s.ordre, s.datetime_local, s.date, s.heure,
+    COALESCE(f.titre, s.titre) AS titre,
+    COALESCE(f.titre_original, '') AS titre_original,
+    COALESCE(f.realisateur, s.realisateur) AS realisateur,
+    COALESCE(f.acteurs_principaux, '') AS acteurs_principaux,
+    COALESCE(f.genres, '') AS genres,
+    COALESCE(f.duree_min, '') AS duree_min,
+    COALESCE(f.annee, '') AS annee,
+    COALESCE(f.pays, '') AS pays,
+    s.version, s.tarif, s.prix, s.categorie, s.commentaire, s.evenement,
+    COALESCE(f.synopsis, '') AS synopsis,
+    COALESCE(f.affiche_url, '') AS affiche_url,
+    COALESCE(f.backdrop_url, '') AS backdrop_url,
+    COALESCE(f.backdrops, '') AS backdrops,
+    COALESCE(f.trailer_url, '') AS trailer_url,
+    COALESCE(s.tmdb_id, '') AS tmdb_id,
+    COALESCE(f.imdb_id, s.imdb_id) AS imdb_id,
+    COALESCE(f.allocine_url, '') AS allocine_url
+FROM seances s LEFT JOIN films_plats f ON f.tmdb_id = s.tmdb_id;
+"""
+
+# séances publiées (hors séances scolaires), dans l'ordre du classeur
+PROGRAMME_SQL = "SELECT * FROM programme WHERE categorie != 'SCOL' ORDER BY ordre"
+
+FILM_COLUMNS = ("imdb_id", "titre", "titre_original", "annee", "duree_min", "synopsis", "affiche_url",
+                "backdrop_url", "trailer_url", "allocine_url", "a_completer")
+SEANCE_COLUMNS = ("datetime_local", "date", "heure", "version", "tarif", "prix", "categorie", "commentaire",
+                  "evenement", "titre", "realisateur", "imdb_id")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _split(text: str) -> list:
+    return [x.strip() for x in str(text or "").split(", ") if x.strip()]
+
+
+def _tmdb_int(value) -> Optional[int]:
+    s = str(value or "").strip()
+    return int(s) if s.isdigit() else None
+
+
+class Catalogue:
+    def __init__(self, path: Path = CATALOGUE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ---------- films ----------
+    def _film(self, where: str, params: tuple) -> Optional[Film]:
+        with self._lock:
+            row = self.conn.execute(f"SELECT * FROM films_plats WHERE {where}", params).fetchone()
+        if row is None:
+            return None
+        d = dict(row)
+        d["tmdb_id"] = str(d["tmdb_id"])
+        d["backdrops"] = json.dumps(json.loads(d["backdrops"]), ensure_ascii=False)   # même texte qu'enrich
+        return film_from_dict(d)
+
+    def film(self, tmdb_id) -> Optional[Film]:
+        tid = _tmdb_int(tmdb_id)
+        return self._film("tmdb_id = ?", (tid,)) if tid is not None else None
+
+    def film_by_imdb(self, imdb_id: str) -> Optional[Film]:
+        imdb = (imdb_id or "").strip()
+        return self._film("imdb_id = ? ORDER BY maj DESC LIMIT 1", (imdb,)) if imdb else None
+
+    def updated(self, tmdb_id) -> Optional[str]:
+        """Date (ISO) du dernier enregistrement de la fiche ; None si le film est absent."""
+        with self._lock:
+            row = self.conn.execute("SELECT maj FROM films WHERE tmdb_id = ?", (_tmdb_int(tmdb_id),)).fetchone()
+        return row[0] if row else None
+
+    def film_for_key(self, cle: str) -> Optional[Film]:
+        return self._film("tmdb_id = (SELECT tmdb_id FROM titres WHERE cle = ?)", (cle,))
+
+    def put_film(self, film: Film, commit: bool = True) -> Optional[int]:
+        """Enregistre (ou remplace) un film résolu ; valeurs multiples → tables structurées."""
+        tid = _tmdb_int(film.tmdb_id)
+        if tid is None:
+            return None
+        try:
+            backdrops = json.loads(film.backdrops) if film.backdrops else []
+        except ValueError:
+            backdrops = []
+        values = [getattr(film, c) or "" for c in FILM_COLUMNS]
+        with self._lock:
+            c = self.conn
+            c.execute(f"INSERT INTO films (tmdb_id, {', '.join(FILM_COLUMNS)}, maj) "
+                      f"VALUES (?, {', '.join('?' * len(FILM_COLUMNS))}, ?) "
+                      f"ON CONFLICT(tmdb_id) DO UPDATE SET "
+                      + ", ".join(f"{k} = excluded.{k}" for k in FILM_COLUMNS + ("maj",)),
+                      (tid, *values, _now()))
+            for table in ("personnes", "genres", "pays", "images"):
+                c.execute(f"DELETE FROM {table} WHERE tmdb_id = ?", (tid,))
+            c.executemany("INSERT INTO personnes VALUES (?, ?, ?, ?)",
+                          [(tid, "realisateur", i, n) for i, n in enumerate(_split(film.realisateur))]
+                          + [(tid, "acteur", i, n) for i, n in enumerate(_split(film.acteurs_principaux))])
+            c.executemany("INSERT INTO genres VALUES (?, ?, ?)", [(tid, i, n) for i, n in enumerate(_split(film.genres))])
+            c.executemany("INSERT INTO pays VALUES (?, ?, ?)", [(tid, i, n) for i, n in enumerate(_split(film.pays))])
+            c.executemany("INSERT INTO images VALUES (?, 'backdrop', ?, ?)",
+                          [(tid, i, u) for i, u in enumerate(backdrops) if u])
+            if commit:
+                c.commit()
+        return tid
+
+    def count_films(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM films").fetchone()[0]
+
+    # ---------- titres ----------
+    def link_title(self, cle: str, tmdb_id, origine: str):
+        with self._lock:
+            self.conn.execute("INSERT INTO titres VALUES (?, ?, ?, ?) ON CONFLICT(cle) DO UPDATE SET "
+                              "tmdb_id = excluded.tmdb_id, origine = excluded.origine, maj = excluded.maj",
+                              (cle, _tmdb_int(tmdb_id), origine, _now()))
+            self.conn.commit()
+
+    def is_known(self, cle: str) -> bool:
+        """Titre déjà résolu, ou en attente d'un choix."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM titres WHERE cle = ? UNION ALL "
+                "SELECT 1 FROM decisions WHERE cle = ? AND statut = 'en_attente' LIMIT 1", (cle, cle)).fetchone() is not None
+
+    # ---------- décisions ----------
+    def add_pending(self, cle: str, titre: str, recherche: str, annee_indice: str, candidats: list):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO decisions (cle, titre, recherche, annee_indice, statut, candidats, ajoute) "
+                "VALUES (?, ?, ?, ?, 'en_attente', ?, ?) ON CONFLICT(cle) DO UPDATE SET "
+                "titre = excluded.titre, recherche = excluded.recherche, annee_indice = excluded.annee_indice, "
+                "statut = 'en_attente', candidats = excluded.candidats, ajoute = excluded.ajoute, "
+                "tmdb_id = NULL, decide = NULL",
+                (cle, titre, recherche, annee_indice or "", json.dumps(candidats, ensure_ascii=False), _now()))
+            self.conn.commit()
+
+    def pending(self) -> dict:
+        """{clé: {"titre", "recherche", "annee_indice", "candidats", "ajoute"}} des titres en attente."""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM decisions WHERE statut = 'en_attente' ORDER BY cle").fetchall()
+        return {r["cle"]: {"titre": r["titre"], "recherche": r["recherche"], "annee_indice": r["annee_indice"],
+                           "candidats": json.loads(r["candidats"]), "ajoute": r["ajoute"]} for r in rows}
+
+    def decide(self, cle: str, tmdb_id):
+        """Choix de l'opérateur (historique conservé)."""
+        with self._lock:
+            self.conn.execute("UPDATE decisions SET statut = 'choisi', tmdb_id = ?, decide = ? WHERE cle = ?",
+                              (_tmdb_int(tmdb_id), _now(), cle))
+            self.conn.commit()
+
+    def drop_pending(self, cle: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM decisions WHERE cle = ? AND statut = 'en_attente'", (cle,))
+            self.conn.commit()
+
+    # ---------- séances ----------
+    def replace_screenings(self, rows: list):
+        """Séances du dernier enrichissement (dicts colonne → valeur du classeur enrichi)."""
+        with self._lock:
+            c = self.conn
+            known = {r[0] for r in c.execute("SELECT tmdb_id FROM films")}
+            for row in rows:
+                tid = _tmdb_int(row.get("tmdb_id"))
+                if tid is not None and tid not in known:
+                    # film repris d'un journal / de l'état watch : absent du catalogue
+                    self.put_film(film_from_dict(row), commit=False)
+                    known.add(tid)
+            c.execute("DELETE FROM seances")
+            c.executemany(f"INSERT INTO seances (ordre, {', '.join(SEANCE_COLUMNS)}, tmdb_id) "
+                          f"VALUES (?, {', '.join('?' * len(SEANCE_COLUMNS))}, ?)",
+                          [(i, *[str(row.get(k, "") or "") for k in SEANCE_COLUMNS], _tmdb_int(row.get("tmdb_id")))
+                           for i, row in enumerate(rows)])
+            c.commit()
+
+    def programme_frame(self):
+        """Séances publiées, aplaties comme le classeur enrichi (DataFrame de str)."""
+        import pandas as pd
+        with self._lock:
+            df = pd.read_sql_query(PROGRAMME_SQL, self.conn)
+        return df.drop(columns=["ordre"]).fillna("").astype(str)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Consultation du catalogue SQLite")
+    p.add_argument("--film", default=None, help="fiche d'un film (tmdb_id)")
+    p.add_argument("--titre", default=None, help="films dont le titre contient ce texte")
+    p.add_argument("--date", default=None, help="séances d'un jour (AAAA-MM-JJ)")
+    args = p.parse_args(argv)
+
+    cat = Catalogue()
+    c = cat.conn
+    if args.film:
+        film = cat.film(args.film)
+        print(json.dumps(film_to_dict(film), ensure_ascii=False, indent=2)
+              if film else f"[info] film {args.film} absent du catalogue")
+    elif args.titre:
+        for r in c.execute("SELECT tmdb_id, titre, annee FROM films WHERE titre LIKE ? ORDER BY titre",
+                           (f"%{args.titre}%",)):
+            print(f"  {r['tmdb_id']:>8}  {r['titre']} ({r['annee'] or '?'})")
+    elif args.date:
+        for r in c.execute("SELECT heure, titre, version FROM programme WHERE date = ? ORDER BY heure", (args.date,)):
+            print(f"  {r['heure']}  {r['titre']}  {r['version']}")
+    else:
+        counts = {t: c.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+                  for t in ("films", "titres", "seances")}
+        n_pending = c.execute("SELECT count(*) FROM decisions WHERE statut = 'en_attente'").fetchone()[0]
+        print(f"=== {cat.path} : {counts['films']} film(s), {counts['titres']} titre(s) connus, "
+              f"{counts['seances']} séance(s), {n_pending} décision(s) en attente ===")
+    cat.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+circuit.py — Disjoncteurs par service externe et budgets de temps.
+
+- CircuitBreaker : ouvert après N échecs consécutifs (erreurs, timeouts, 5xx) ;
+  tant qu'il est ouvert, les appels échouent immédiatement (CircuitOpen) ;
+  après reset_timeout, un seul appel d'essai (semi-ouvert) : succès → fermé, échec → rouvert
+- Budget : échéance (par ligne, par exécution) ; sert à borner les timeouts des appels
+  et à décider du mode dégradé
+- Thread-safe (les recherches de réalisateurs passent par un ThreadPoolExecutor)
+"""
+
+import threading, time
+
+import metrics
+
+
+class CircuitOpen(RuntimeError):
+    """Service indisponible : disjoncteur ouvert, appel non tenté."""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "fermé", "ouvert", "semi-ouvert"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True     # un seul appel d'essai à la fois
+                return True
+        metrics.count(f"court_circuit_{self.name}")
+        return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} indisponible (disjoncteur {self.state})")
+
+    def success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"[warn] {self.name} : {self.failures} échec(s) → disjoncteur ouvert "
+                          f"({self.reset_timeout:.0f} s)")
+                    metrics.count(f"disjoncteur_{self.name}")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def reset(self):
+        self.success()
+
+
+class Budget:
+    """Échéance en secondes (None ou 0 : illimité)."""
+
+    def __init__(self, seconds: float = None):
+        self.seconds = seconds or None
+        self.deadline = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> float:
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def extend(self, seconds: float):
+        """Repousse l'échéance (temps passé hors du budget, ex. choix de l'opérateur)."""
+        if self.deadline is not None:
+            self.deadline += seconds
+
+    def timeout(self, default: float, floor: float = 1.0) -> float:
+        """Timeout d'un appel : celui du service, borné par le temps restant."""
+        return max(floor, min(default, self.remaining()))
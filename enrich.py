@@ -13,28 +13,30 @@ enrich.py — Enrichit un Excel "normalisé" avec les données TMDB.
 - Réalisateurs préchargés en parallèle pour les 5 meilleurs choix (rapide)
 - Cache pour éviter les requêtes répétées
 - Lit depuis work/{--in}, écrit work/{--out}
+- Journal work/enrich_journal.jsonl (une entrée par ligne terminée) ; --resume reprend
+  un enrichissement interrompu à la première ligne non traitée
+- Aucune dépendance Tk : le choix interactif passe par la console, ou par le
+  callback select_movie(titre, choix) -> int fourni par l'appelant (GUI)
+- Appel depuis un thread : progress(faits, total, titre) et cancel (threading.Event)
+  optionnels ; une annulation garde et écrit les lignes déjà enrichies
+- Imports lourds (pandas, requests, name_tools, unidecode) différés au premier usage
 """
 
-import os, sys, argparse, json, time, difflib
+import os, sys, argparse, json, threading, time, difflib
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
 
-import pandas as pd
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-import  tkinter as tk
-from tkinter import ttk as ttk
-import name_tools as nt
-from unidecode import unidecode
-
+import metrics
+import xlsx_io
+from circuit import Budget, CircuitBreaker
+from model import Table
 
 
 # ---------- Constantes ----------
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "").strip()
-print("API_KEY (enrich): "+os.environ.get("TMDB_API_KEY", "").strip())
 
 TMDB_BASE = "https://api.themoviedb.org/3"
 LANG_DEFAULT = "fr-FR"
@@ -44,8 +46,11 @@ IMG_W500 = "https://image.tmdb.org/t/p/w500"
 IMG_W780 = "https://image.tmdb.org/t/p/w780"
 IMG_ORIG = "https://image.tmdb.org/t/p/original"
 
-mode_Gui=False
-window=None
+WIKIDATA_SPARQL = "https://query.wikidata.org/sparql"
+WIKIDATA_UA = {"User-Agent": "CineCarbonne/1.0 (contact: webmaster@cine-carbonne.example)"}
+
+# callback de sélection interactive (GUI) : select_movie(titre, choix) -> 0..n ; None = console
+SELECT_MOVIE = None
 
 OUTPUT_ENRICH_COLS = [
     "datetime_local",
@@ -56,6 +61,9 @@ OUTPUT_ENRICH_COLS = [
     "categorie",
     "commentaire",
     "prix",
+    "evenement",
+    "titre_recherche",
+    "annee_indice",
     "titre",
     "titre_original",
     "realisateur",
@@ -71,12 +79,29 @@ OUTPUT_ENRICH_COLS = [
     "trailer_url",
     "tmdb_id",
     "imdb_id",
-    "allocine_url"
+    "allocine_url",
+    "a_completer"
 ]
 
 SUSPECT_WORDS = ("club", "jeunes", "patrimoine")
 
+JOURNAL_NAME = "enrich_journal.jsonl"
+
+# disjoncteurs par service : après N échecs consécutifs, plus d'appel pendant reset_timeout
+BREAKERS = {
+    "tmdb":     CircuitBreaker("tmdb", failure_threshold=5, reset_timeout=60.0),
+    "wikidata": CircuitBreaker("wikidata", failure_threshold=3, reset_timeout=300.0),
+}
+TMDB_TIMEOUT = 12
+WIKIDATA_TIMEOUT = 6
+ROW_BUDGET_S = 45       # au-delà, la ligne passe en mode dégradé
+# budgets courants (illimités hors run() : watch, scripts)
+ROW_BUDGET = Budget()
+RUN_BUDGET = Budget()
+
 DETAILS_CACHE: dict[tuple[int, str], dict] = {}
+PROMPT_LOCK = threading.Lock()
+HTTP_CACHE = None       # refresh.py : réponses TMDB + validateurs (requêtes conditionnelles)
 CREDITS_CACHE: dict[tuple[int, str], dict] = {}
 
 
@@ -88,6 +113,10 @@ def _with_timeout(func, timeout=12):
     return wrapped
 
 def make_session(timeout=12):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     sess = requests.Session()
     retries = Retry(total=5, backoff_factor=0.4,
                     status_forcelist=(429, 500, 502, 503, 504),
@@ -95,18 +124,29 @@ def make_session(timeout=12):
     adapter = HTTPAdapter(max_retries=retries, pool_connections=20, pool_maxsize=20)
     sess.mount("http://", adapter)
     sess.mount("https://", adapter)
+    # Wikidata (optionnel) : une seule relance, le disjoncteur fait le reste
+    wd_retries = Retry(total=1, backoff_factor=0.4,
+                       status_forcelist=(429, 500, 502, 503, 504),
+                       allowed_methods=["GET"])
+    sess.mount(WIKIDATA_SPARQL, HTTPAdapter(max_retries=wd_retries))
     sess.request = _with_timeout(sess.request, timeout=timeout)  # type: ignore
     return sess
 
-SESSION = make_session()
+SESSION = None
+
+def get_session():
+    """Session HTTP partagée, créée au premier appel réseau."""
+    global SESSION
+    if SESSION is None:
+        SESSION = make_session()
+    return SESSION
 
 # ---------- Wikidata / Allociné ----------
-WIKIDATA_SPARQL = "https://query.wikidata.org/sparql"
-WIKIDATA_UA = {"User-Agent": "CineCarbonne/1.0 (contact: webmaster@cine-carbonne.example)"}
 
 def allocine_url_from_imdb(imdb_id: str) -> Optional[str]:
     """Retourne l'URL Allociné via Wikidata P1265 à partir d'un IMDb ID (ttxxxxxx).
     Ex: tt1375666 -> https://www.allocine.fr/film/fichefilm_gen_cfilm=143692.html
+    None si Wikidata ne connaît pas le film ; exception si le service est en échec.
     """
     imdb_id = (imdb_id or "").strip()
     if not imdb_id:
@@ -118,33 +158,81 @@ def allocine_url_from_imdb(imdb_id: str) -> Optional[str]:
             wdt:P1265 ?allo .
     }} LIMIT 1
     """
+    breaker = BREAKERS["wikidata"]
+    breaker.check()
     try:
-        r = SESSION.get(WIKIDATA_SPARQL, params={"query": q, "format": "json"}, headers=WIKIDATA_UA)
-        if r.status_code != 200:
-            return None
+        with metrics.timed_request("sparql") as m:
+            r = get_session().get(WIKIDATA_SPARQL, params={"query": q, "format": "json"}, headers=WIKIDATA_UA,
+                                  timeout=ROW_BUDGET.timeout(WIKIDATA_TIMEOUT))
+            m["response"] = r
+        r.raise_for_status()
         data = r.json()
-        b = data.get("results", {}).get("bindings", [])
-        if not b:
-            return None
-        allo_id = b[0]["allo"]["value"]
-        return f"https://www.allocine.fr/film/fichefilm_gen_cfilm={allo_id}.html"
     except Exception:
+        breaker.failure()
+        raise
+    breaker.success()
+    b = data.get("results", {}).get("bindings", [])
+    if not b:
         return None
+    allo_id = b[0]["allo"]["value"]
+    return f"https://www.allocine.fr/film/fichefilm_gen_cfilm={allo_id}.html"
+
 
+def _endpoint_name(path: str) -> str:
+    """Nom court de l'endpoint TMDB pour l'instrumentation (search, details, credits...)."""
+    parts = [p for p in path.split("/") if p]
+    if parts and parts[0] in ("search", "find"):
+        return parts[0]
+    return parts[2] if len(parts) > 2 else "details"
 
 def tmdb_get(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
     if not TMDB_API_KEY:
         raise RuntimeError("TMDB_API_KEY manquant.")
     url = f"{TMDB_BASE}{path}"
     full = {"api_key": TMDB_API_KEY, **params}
-    r = SESSION.get(url, params=full)
+    cache = HTTP_CACHE
+    headers = cache.validators(url, params) if cache is not None else {}
+    breaker = BREAKERS["tmdb"]
+    breaker.check()
+    try:
+        with metrics.timed_request(_endpoint_name(path)) as m:
+            r = get_session().get(url, params=full, headers=headers or None,
+                                  timeout=ROW_BUDGET.timeout(TMDB_TIMEOUT))
+            m["response"] = r
+    except Exception:
+        breaker.failure()
+        raise
+    # 4xx (film inconnu, ...) : le service répond, ce n'est pas une panne
+    if r.status_code >= 500 or r.status_code == 429:
+        breaker.failure()
+    else:
+        breaker.success()
+    if cache is not None and headers:
+        metrics.cache("http_conditionnel", r.status_code == 304)
+        if r.status_code == 304:
+            return cache.body(url, params)
     r.raise_for_status()
-    return r.json()
+    data = r.json()
+    if cache is not None:
+        cache.store(url, params, r.headers, data)
+    return data
+
+
+def degraded() -> bool:
+    """Mode dégradé : budget de la ligne ou de l'exécution épuisé → recherches optionnelles passées."""
+    return ROW_BUDGET.expired() or RUN_BUDGET.expired()
 
 
 # ---------- TMDB helpers ----------
-def search_movie(query: str, lang: str) -> List[Dict[str, Any]]:
-    data = tmdb_get("/search/movie", {"query": query, "language": lang, "include_adult": False})
+def search_movie(query: str, lang: str, year: str = None) -> List[Dict[str, Any]]:
+    params = {"query": query, "language": lang, "include_adult": False}
+    if year:
+        # année lue dans le titre source : filtre, puis recherche sans filtre si rien ne correspond
+        data = tmdb_get("/search/movie", {**params, "primary_release_year": year})
+        if data.get("results"):
+            return data["results"]
+        metrics.count("annee_indice_sans_resultat")
+    data = tmdb_get("/search/movie", params)
     return data.get("results", []) or []
 
 def get_movie_details(mid: int, lang: str): return tmdb_get(f"/movie/{mid}", {"language": lang})
@@ -222,6 +310,9 @@ def _composite(query, res):
     return 0.65 * sim + 0.35 * pop
 
 def _director_similarity(given, proposed):
+    import name_tools as nt
+    from unidecode import unidecode
+
     #normalize given director name
     a=nt.canonicalize(given).split()
     a.sort()
@@ -236,10 +327,22 @@ def _director_similarity(given, proposed):
 def _rank_key(query, res):
     return (_year_bucket(res), _composite(query, res))
 
+def rank_candidates(cands, title):
+    return sorted(cands, key=lambda c: _rank_key(title, c), reverse=True)
+
+def autopick(ordered, title, auto_margin):
+    """Candidat retenu sans intervention (seul, ou nettement devant le 2e), sinon None."""
+    if len(ordered) == 1:
+        return ordered[0]
+    if len(ordered) >= 2 and _composite(title, ordered[0]) - _composite(title, ordered[1]) >= auto_margin:
+        return ordered[0]
+    return None
+
 
 # ---------- Cache réalisateurs ----------
 def get_director_str_cached(mid: int, lang: str) -> str:
     key = (mid, lang)
+    metrics.cache("credits", key in CREDITS_CACHE)
     if key in CREDITS_CACHE:
         crew = CREDITS_CACHE[key].get("crew") or []
     else:
@@ -255,18 +358,15 @@ def auto_pick_or_prompt(cands, title, director, _unused, auto_margin, *,
                         lang_for_director="fr-FR", force_prompt=False):
     if not cands:
         print(f"[info] Aucun résultat TMDB pour: {title}")
+        metrics.count("no_result")
         return None
 
-    ordered = sorted(cands, key=lambda c: _rank_key(title, c), reverse=True)
-    if len(ordered) == 1 and not force_prompt:
-        return ordered[0]
-
-    if len(ordered) >= 2 and not force_prompt:
-        s1 = _composite(title, ordered[0])
-        s2 = _composite(title, ordered[1])
-        if (s1 - s2) >= auto_margin:
-            return ordered[0]
-
+    ordered = rank_candidates(cands, title)
+    if not force_prompt:
+        picked = autopick(ordered, title, auto_margin)
+        if picked is not None:
+            metrics.count("autopick")
+            return picked
 
     # --- liste interactive ---
     short = ordered[:10]
@@ -282,87 +382,130 @@ def auto_pick_or_prompt(cands, title, director, _unused, auto_margin, *,
             except Exception:
                 directors[mid] = ""
 
-    if (not mode_Gui):
-        print("\nPlusieurs correspondances pour:", title)
-    else :
-        choices=[]
-    for idx, c in enumerate(short, start=1):
-        tit = c.get("title") or c.get("name") or ""
-        rd  = c.get("release_date") or ""
-        yy  = rd[:4] if rd else "----"
-        pop = float(c.get("popularity") or 0.0)
-        sim = _title_similarity(title, c)
-        mid = int(c.get("id"))
-        direc = directors.get(mid, "")
-        #si la comparaison du nom du realisateur depasse eun score de 0.9 on peut raisonnablement pensé qu'il s'agit du bon film
-        if _director_similarity(director,direc) >= 0.9 :
-            return short[idx-1]
-        suffix = f" — {direc}" if direc else ""
-        if (not mode_Gui):
-            print(f"  [{idx}] {tit}{suffix} ({yy})  pop={pop:.1f}  sim={sim:.2f}")
+    # un seul choix à la fois (workers du pipeline en flux) ; les autres films continuent
+    with PROMPT_LOCK:
+        if SELECT_MOVIE is None:
+            print("\nPlusieurs correspondances pour:", title)
         else :
-            choice_str=f"  [{idx}] {tit}{suffix} ({yy})  pop={pop:.1f}  sim={sim:.2f}"
-            choices.append(choice_str)
-
-    if (mode_Gui):
-        choice=gui_select_movie(title,choices)
-    else:
-        print("  [0] Aucun / passer")
-
-        while True:
-            try:
-                choice = int(input("Choix ? [0..9] : ").strip() or "1")
-            except Exception:
-                choice = -1
-            if 0 <= choice <= min(10, len(short)):
-                break
-            print("Entrée invalide.")
-    if choice == 0:
-        return None
-    return short[choice - 1]
+            choices=[]
+        for idx, c in enumerate(short, start=1):
+            tit = c.get("title") or c.get("name") or ""
+            rd  = c.get("release_date") or ""
+            yy  = rd[:4] if rd else "----"
+            pop = float(c.get("popularity") or 0.0)
+            sim = _title_similarity(title, c)
+            mid = int(c.get("id"))
+            direc = directors.get(mid, "")
+            #si la comparaison du nom du realisateur depasse eun score de 0.9 on peut raisonnablement pensé qu'il s'agit du bon film
+            if _director_similarity(director,direc) >= 0.9 :
+                metrics.count("director_pick")
+                return short[idx-1]
+            suffix = f" — {direc}" if direc else ""
+            if SELECT_MOVIE is None:
+                print(f"  [{idx}] {tit}{suffix} ({yy})  pop={pop:.1f}  sim={sim:.2f}")
+            else :
+                choice_str=f"  [{idx}] {tit}{suffix} ({yy})  pop={pop:.1f}  sim={sim:.2f}"
+                choices.append(choice_str)
+
+        metrics.count("prompt")
+        t_prompt = time.perf_counter()
+        if SELECT_MOVIE is not None:
+            choice=SELECT_MOVIE(title,choices)
+        else:
+            print("  [0] Aucun / passer")
+
+            while True:
+                try:
+                    choice = int(input("Choix ? [0..9] : ").strip() or "1")
+                except EOFError:
+                    # exécution sans console (tâche planifiée) : on passe
+                    choice = 0
+                except Exception:
+                    choice = -1
+                if 0 <= choice <= min(10, len(short)):
+                    break
+                print("Entrée invalide.")
+        waited = time.perf_counter() - t_prompt
+        metrics.prompt_wait(waited)
+        # le temps de réflexion de l'opérateur ne compte pas dans le budget de la ligne
+        ROW_BUDGET.extend(waited)
+        if choice == 0:
+            return None
+        return short[choice - 1]
 
 
 # ---------- Pipeline ----------
+# colonnes du classeur normalisé → champs du modèle
+COLUMN_ALIASES = {"Titre": "titre", "TitreOriginal": "titre_original", "Realisateur": "realisateur",
+                  "ActeursPrincipaux": "acteurs_principaux", "Genres": "genres", "Annee": "annee",
+                  "Pays": "pays", "DureeMin": "duree_min", "Synopsis": "synopsis",
+                  "AfficheURL": "affiche_url", "BackdropURL": "backdrop_url",
+                  "TrailerURL": "trailer_url", "Date": "date", "Heure": "heure",
+                  "Version": "version", "Tarif": "tarif", "Categorie": "categorie",
+                  "Commentaire": "commentaire", "datetime_local": "datetime_local",
+                  "TmdbId": "tmdb_id", "ImdbId": "imdb_id"}
+
 def normalize_columns(df):
-    mapping = {"Titre": "titre", "TitreOriginal": "titre_original", "Realisateur": "realisateur",
-               "ActeursPrincipaux": "acteurs_principaux", "Genres": "genres", "Annee": "annee",
-               "Pays": "pays", "DureeMin": "duree_min", "Synopsis": "synopsis",
-               "AfficheURL": "affiche_url", "BackdropURL": "backdrop_url",
-               "TrailerURL": "trailer_url", "Date": "date", "Heure": "heure",
-               "Version": "version", "Tarif": "tarif", "Categorie": "categorie",
-               "Commentaire": "commentaire", "datetime_local": "datetime_local"}
-    for o, n in mapping.items():
-        if o in df.columns and n not in df.columns:
-            df[n] = df[o]
-    return df
+    import pandas as pd
+    added = {n: df[o] for o, n in COLUMN_ALIASES.items() if o in df.columns and n not in df.columns}
+    return pd.concat([df, pd.DataFrame(added, index=df.index)], axis=1) if added else df
 
 def ensure_output_cols(df):
-    for c in OUTPUT_ENRICH_COLS:
-        if c not in df.columns:
-            df[c] = ""
-    if "backdrops" not in df.columns:
-        df["backdrops"] = ""
-    return df
-
-
-def enrich_row(row, args, force_prompt=False):
-    global window
-    if mode_Gui :
-        window.config(cursor="watch")
-    row = row.copy()
-    title = (row.get("titre") or row.get("Titre") or "").strip()
-    director= (row.get("realisateur") or row.get("Realisateur") or "").strip()
-    if not title:
-        return row
-
-    cands_fr = search_movie(title, args.lang)
-    chosen = auto_pick_or_prompt(cands_fr, title, director, None, args.auto_margin,
-                                 lang_for_director=args.lang, force_prompt=force_prompt)
-    details_fr = get_movie_details(chosen["id"], args.lang) if chosen else None
-
-    details_en = None
-    if not details_fr:
-        cands_en = search_movie(title, "en-US")
+    missing = [c for c in dict.fromkeys(OUTPUT_ENRICH_COLS + ["backdrops"]) if c not in df.columns]
+    return df.reindex(columns=[*df.columns, *missing], fill_value="") if missing else df
+
+
+def suspect_text(s) -> str:
+    return f"{s.categorie} || {s.commentaire}".lower()
+
+def has_explicit_id(film) -> bool:
+    """Film désigné dans le classeur (colonne identifiant) : ni recherche, ni choix."""
+    return bool((film.tmdb_id or "").strip() or (film.imdb_id or "").strip())
+
+def resolve_explicit_id(film) -> Optional[int]:
+    """Id TMDB connu d'avance : tel quel, ou via /find pour un tt-id IMDb."""
+    tid = (film.tmdb_id or "").strip()
+    if tid.isdigit():
+        return int(tid)
+    imdb = (film.imdb_id or "").strip()
+    if imdb:
+        found = tmdb_get(f"/find/{imdb}", {"external_source": "imdb_id"}).get("movie_results") or []
+        if found:
+            return int(found[0]["id"])
+        print(f"[warn] {imdb} introuvable sur TMDB : recherche par titre")
+    return None
+
+def needs_manual_pick(s) -> bool:
+    """Mots-clés "anciens films" en catégorie / commentaire → choix manuel forcé."""
+    if has_explicit_id(s.film):
+        return False
+    txt = suspect_text(s)
+    return any(w in txt for w in SUSPECT_WORDS)
+
+
+def enrich_row(s, args, force_prompt=False):
+    """Screening (model.py) → Screening enrichie ; s n'est pas modifiée."""
+    # titre nettoyé (titles.py) pour la recherche ; le titre source reste dans le classeur
+    title = (s.titre_recherche or s.film.titre or "").strip()
+    year = (s.annee_indice or "").strip() or None
+    director= (s.film.realisateur or "").strip()
+
+    details_fr = details_en = None
+    explicit = resolve_explicit_id(s.film) if has_explicit_id(s.film) else None
+    if explicit is not None:
+        # id fourni dans le classeur : pas de recherche ni de choix
+        metrics.count("explicit_id")
+        details_fr = get_movie_details(explicit, args.lang)
+    elif not title:
+        return s
+    else:
+        cands_fr = search_movie(title, args.lang, year)
+        chosen = auto_pick_or_prompt(cands_fr, title, director, None, args.auto_margin,
+                                     lang_for_director=args.lang, force_prompt=force_prompt)
+        details_fr = get_movie_details(chosen["id"], args.lang) if chosen else None
+
+    if not details_fr and explicit is None and title:
+        cands_en = search_movie(title, "en-US", year)
         chosen = auto_pick_or_prompt(cands_en, title, director, None, args.auto_margin,
                                      lang_for_director="en-US", force_prompt=force_prompt)
         if chosen:
@@ -370,12 +513,26 @@ def enrich_row(row, args, force_prompt=False):
 
     details = details_fr or details_en
     if not details:
-        return row
+        return s
 
     mid = int(details.get("id"))
     credits = get_movie_credits(mid, args.lang)
-    videos = get_movie_videos(mid, args.lang)
-    images = get_movie_images(mid)
+
+    # recherches optionnelles : passées en mode dégradé ou en cas d'échec,
+    # la ligne est alors marquée "a_completer" pour un rattrapage ultérieur
+    skipped = []
+    def optional(name, func, *fargs, default=None):
+        if degraded():
+            skipped.append(name)
+            return default
+        try:
+            return func(*fargs)
+        except Exception:
+            skipped.append(name)
+            return default
+
+    videos = optional("videos", get_movie_videos, mid, args.lang, default={})
+    images = optional("backdrops", get_movie_images, mid, default={})
 
     poster = pick_best_poster(details) or (IMG_W500 + details.get("poster_path", "")) if details.get("poster_path") else ""
     best_back = pick_best_backdrop(images, details_fr, details_en) or ""
@@ -386,109 +543,211 @@ def enrich_row(row, args, force_prompt=False):
     pays = extract_countries(details)
     trailer = find_trailer_youtube(videos) or ""
 
-    row["tmdb_id"] = str(mid)
-    row["imdb_id"] = (details.get("imdb_id") or "").strip()
+    old = s.film
+    film = replace(old)
+    film.tmdb_id = str(mid)
+    film.imdb_id = (details.get("imdb_id") or "").strip() or old.imdb_id
     # Allociné via Wikidata (IMDb -> Wikidata P1265)
-    try:
-        row["allocine_url"] = allocine_url_from_imdb(row["imdb_id"]) or row.get("allocine_url", "")
-    except Exception:
-        row["allocine_url"] = row.get("allocine_url", "")
-    row["affiche_url"] = poster or row.get("affiche_url", "")
-    row["backdrop_url"] = best_back or row.get("backdrop_url", "")
-    row["backdrops"] = json.dumps(all_backs, ensure_ascii=False)
-    row["titre"] = details.get("title") or row.get("titre", "")
-    row["titre_original"] = details.get("original_title") or row.get("titre_original", "")
-    row["realisateur"] = dirs or row.get("realisateur", "")
-    row["acteurs_principaux"] = main or row.get("acteurs_principaux", "")
-    row["genres"] = genres or row.get("genres", "")
-    row["annee"] = (details.get("release_date") or "")[:4] or row.get("annee", "")
-    row["pays"] = pays or row.get("pays", "")
-    row["duree_min"] = str(details.get("runtime") or "").strip() or row.get("duree_min", "")
-    row["synopsis"] = (details_fr or {}).get("overview") or (details_en or {}).get("overview") or row.get("synopsis", "")
-    row["trailer_url"] = trailer or row.get("trailer_url", "")
-    if mode_Gui:
-        window.config(cursor="")
-    return row
-
-def gui_select_movie(title,choices):
-    global window
-    window.attributes("-topmost", True)
-
-    new_window = tk.Toplevel(window)
-    new_window.title("selection : %s" %title)
-    hauteur=str(30*len(choices)+20)
-    new_window.geometry("600x%s" %hauteur)
-
-    choice=tk.IntVar(new_window, value = 0  )
-
-    var=1
-    for c in choices:
-        ttk.Radiobutton(new_window, text=c, variable=choice, value=var).pack(fill='x')
-        var+=1
-    tk.Button(new_window, text="Valider/Passer", command=new_window.destroy).pack()
-    #force display
-    window.attributes("-topmost", False)
-    new_window.attributes("-topmost", True)
-    window.update()
-    window.update_idletasks()
-
-    window.wait_window(new_window)
-    return choice.get()
-
-def main(main_window=None):
+    film.allocine_url = optional("allocine", allocine_url_from_imdb, film.imdb_id) or old.allocine_url
+    film.a_completer = ",".join(skipped)
+    if skipped:
+        metrics.count("degraded_rows")
+    film.affiche_url = poster or old.affiche_url
+    film.backdrop_url = best_back or old.backdrop_url
+    film.backdrops = json.dumps(all_backs, ensure_ascii=False)
+    film.titre = details.get("title") or old.titre
+    film.titre_original = details.get("original_title") or old.titre_original
+    film.realisateur = dirs or old.realisateur
+    film.acteurs_principaux = main or old.acteurs_principaux
+    film.genres = genres or old.genres
+    film.annee = (details.get("release_date") or "")[:4] or old.annee
+    film.pays = pays or old.pays
+    film.duree_min = str(details.get("runtime") or "").strip() or old.duree_min
+    film.synopsis = (details_fr or {}).get("overview") or (details_en or {}).get("overview") or old.synopsis
+    film.trailer_url = trailer or old.trailer_url
+    return replace(s, film=film)
+
+def enrich_cached(s, args, store, force_prompt=False):
+    """enrich_row précédé du magasin de films (film_store.py) ; le résultat y est enregistré."""
+    if store is None or force_prompt:
+        return enrich_row(s, args, force_prompt=force_prompt)
+    if has_explicit_id(s.film):
+        film = store.get_explicit(s.film)
+        metrics.cache("films", film is not None)
+        if film is not None:
+            return replace(s, film=film)
+        s = enrich_row(s, args)
+        store.put_film(s.film)
+        return s
+    title = (s.titre_recherche or s.film.titre or "").strip()
+    film = store.get(title, s.annee_indice)
+    metrics.cache("films", film is not None)
+    if film is not None:
+        return replace(s, film=film)
+    s = enrich_row(s, args)
+    store.put(title, s.annee_indice, s.film, "enrich")
+    return s
+
+def arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser()
     p.add_argument("--in", dest="in_xlsx", default="normalized.xlsx")
     p.add_argument("--out", dest="out_xlsx", default="enriched.xlsx")
     p.add_argument("--lang", dest="lang", default=LANG_DEFAULT)
     p.add_argument("--auto-margin", dest="auto_margin", type=float, default=4.0)
-    args = p.parse_args()
-
-    # positionnement de mode_GUI afin de gérer  la selection des films
-    global  mode_Gui,window,TMDB_API_KEY
-
-    if (main_window ) :
-        mode_Gui=True
-        window=main_window
-        root=Path(os.getcwd())
-        TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "").strip()
-    else:
-        root = Path(__file__).resolve().parent
+    # enregistrement / rejeu des appels TMDB + Wikidata (cf. http_replay.py)
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", dest="cassettes", default=None, help="défaut : work/cassettes")
+    p.add_argument("--latency", dest="latency", type=float, default=0.0, help="replay : latence par requête (s)")
+    p.add_argument("--error-rate", dest="error_rate", type=float, default=0.0, help="replay : part de 503 injectés")
+    p.add_argument("--rate-limit-rate", dest="rate_limit_rate", type=float, default=0.0, help="replay : part de 429 injectés")
+    p.add_argument("--resume", dest="resume", action="store_true",
+                   help="reprendre depuis work/enrich_journal.jsonl")
+    p.add_argument("--profile", dest="profile", action="store_true", help="profil cProfile dans work/profiles/")
+    p.add_argument("--force", dest="force", action="store_true", help="relancer même si l'entrée n'a pas changé")
+    p.add_argument("--row-budget", dest="row_budget", type=float, default=ROW_BUDGET_S,
+                   help="secondes par ligne avant mode dégradé (0 : illimité)")
+    p.add_argument("--run-budget", dest="run_budget", type=float, default=0,
+                   help="secondes pour l'étape avant mode dégradé (0 : illimité)")
+    p.add_argument("--no-xlsx", dest="no_xlsx", action="store_true",
+                   help="ne pas écrire le classeur enrichi (export depuis le catalogue)")
+    return p
+
+
+@metrics.instrumented("enrich")
+def main(argv=None, select_movie=None, root=None, progress=None, cancel=None):
+    args = arg_parser().parse_args(argv)
+
+    if args.profile:
+        import profiling
+        return profiling.run("enrich", run, args, select_movie, root, progress, cancel)
+    return run(args, select_movie, root, progress, cancel)
+
+
+def run(args, select_movie=None, root=None, progress=None, cancel=None):
+    """root : répertoire contenant work/ (défaut : celui du script ; la GUI passe son cwd)."""
+    # sélection interactive des films : callback GUI ou console
+    global SELECT_MOVIE, TMDB_API_KEY, ROW_BUDGET, RUN_BUDGET
+    SELECT_MOVIE = select_movie
+    TMDB_API_KEY = os.environ.get("TMDB_API_KEY", "").strip() or TMDB_API_KEY
+
+    root = Path(root) if root else Path(__file__).resolve().parent
     work = root / "work"
     work.mkdir(parents=True, exist_ok=True)
     in_path = work / args.in_xlsx
     out_path = work / args.out_xlsx
 
+    if args.http_mode != "live":
+        import http_replay
+        cassettes = Path(args.cassettes) if args.cassettes else work / "cassettes"
+        opts = {}
+        if args.http_mode == "replay":
+            opts = {"latency": args.latency, "error_rate": args.error_rate,
+                    "rate_limit_rate": args.rate_limit_rate}
+            # pas de réseau : la clé n'est pas nécessaire
+            TMDB_API_KEY = TMDB_API_KEY or "replay"
+        http_replay.install(get_session(), args.http_mode, cassettes, **opts)
+        print(f"[info] HTTP {args.http_mode} : {cassettes}")
+
     if not in_path.exists():
         print(f"[ERREUR] {in_path} introuvable.")
         sys.exit(1)
 
+    import film_store, manifest, titles
+    # --no-xlsx : sortie = catalogue (export --from-catalogue)
+    outputs = [root / film_store.STORE_PATH] if args.no_xlsx else [out_path]
+    m = manifest.for_stage("enrich", {"lang": args.lang, "auto_margin": args.auto_margin, "http": args.http_mode,
+                                      "xlsx": not args.no_xlsx},
+                           root=root, inputs=[in_path] + titles.rules_files(root), outputs=outputs)
+    if not args.force and m.is_fresh():
+        print(manifest.skip_message(m))
+        metrics.count("skipped")
+        return
+
+    import pandas as pd
     df = pd.read_excel(in_path, dtype=str).fillna("")
     df = normalize_columns(df)
     df = ensure_output_cols(df)
 
+    metrics.set_rows(rows_in=len(df))
+    # un objet compact par séance ; le DataFrame n'est reconstruit qu'à l'écriture
+    table, screenings = Table.from_frame(df)
+    del df
+    cleaned = titles.annotate(screenings, root / titles.RULES_PATH)
+    if cleaned:
+        print(f"[info] {cleaned} titre(s) nettoyé(s) avant recherche (titles.py)")
+        metrics.count("titres_nettoyes", cleaned)
+        metrics.count("annee_indice", sum(1 for s in screenings if s.annee_indice))
+
+    import journal
+    # code et règles de titres dans l'en-tête : une reprise ne rejoue pas des lignes
+    # enrichies par une autre version
+    header = {"input": journal.file_sha256(in_path), "lang": args.lang, "auto_margin": args.auto_margin,
+              "code": manifest.code_version("enrich"),
+              "rules": [journal.file_sha256(p) for p in titles.rules_files(root)]}
+    if args.resume and args.force:
+        print("[info] --force : journal ignoré, toutes les lignes sont enrichies à nouveau")
+    jr = journal.Journal(work / JOURNAL_NAME, header, resume=args.resume and not args.force)
+    for i, data in jr.done.items():
+        if i < len(screenings):
+            screenings[i] = table.screening_from_dict(data)
+    if jr.done:
+        print(f"[info] reprise : {len(jr.done)} ligne(s) déjà enrichie(s) (journal)")
+        metrics.count("resumed_rows", len(jr.done))
+
+    store = film_store.FilmStore.load(root / film_store.STORE_PATH)
     flagged = []
-    print(f"[info] {len(df)} lignes à traiter")
-    for i in range(len(df)):
-        row = df.iloc[i].copy()
+    done = 0
+    complete = True    # manifeste écrit seulement si toutes les lignes sont enrichies
+    total = len(screenings)
+    print(f"[info] {total} lignes à traiter")
+    RUN_BUDGET = Budget(args.run_budget)
+    run_degraded = False
+    for breaker in BREAKERS.values():
+        breaker.reset()
+    for i in range(total):
+        if i in jr.done:
+            done += 1
+            continue
+        if cancel is not None and cancel.is_set():
+            print("\n[stop] annulé.")
+            metrics.count("cancelled")
+            complete = False
+            break
+        s = screenings[i]
+        ROW_BUDGET = Budget(args.row_budget)
+        if RUN_BUDGET.expired() and not run_degraded:
+            print(f"[warn] budget d'exécution ({args.run_budget:g} s) épuisé : mode dégradé pour les lignes restantes")
+            run_degraded = True
+        if progress is not None:
+            progress(i, total, s.film.titre)
 
-        cat = (row.get("categorie") or row.get("Categorie") or "")
-        com = (row.get("commentaire") or row.get("Commentaire") or "")
-        txt = f"{cat} || {com}".lower()
         need_prompt = False
-        if any(w in txt for w in SUSPECT_WORDS):
-            t = (row.get("titre") or row.get("Titre") or row.get("titre_original") or "Sans titre")
+        if needs_manual_pick(s):
+            txt = suspect_text(s)
+            t = (s.film.titre or s.film.titre_original or "Sans titre")
             print(f"[alerte] '{t}' : mot-clé trouvé → {txt}")
-            flagged.append({"index": i, "titre": t, "categorie": cat, "commentaire": com})
+            flagged.append({"index": i, "titre": t, "categorie": s.categorie, "commentaire": s.commentaire})
+            metrics.count("flagged")
             need_prompt = True
 
         try:
-            df.iloc[i] = enrich_row(row, args, force_prompt=need_prompt)
+            screenings[i] = enrich_cached(s, args, store, force_prompt=need_prompt)
+            jr.append(i, {k: "" if v is None else str(v) for k, v in table.as_dict(screenings[i]).items()})
         except KeyboardInterrupt:
             print("\n[stop] interrompu.")
+            complete = False
             break
         except Exception as e:
             print(f"[warn] Ligne {i}: {e}")
+            metrics.count("row_errors")
+            complete = False
             time.sleep(0.2)
+        done += 1
+
+    jr.close()
+    ROW_BUDGET = RUN_BUDGET = Budget()
+    if progress is not None:
+        progress(done, total, "")
 
     if flagged:
         print("\n=== Films potentiellement 'anciens' ===")
@@ -500,9 +759,16 @@ def main(main_window=None):
                 print(f"   commentaire : {f['commentaire']}")
         print("=== Fin liste ===\n")
 
-    print(f"[info] Écriture : {out_path}")
-    with pd.ExcelWriter(out_path, engine="openpyxl") as w:
-        df.to_excel(w, index=False)
+    metrics.set_rows(rows_out=sum(1 for s in screenings if str(s.film.tmdb_id).strip()))
+    if args.no_xlsx:
+        print(f"[info] --no-xlsx : {out_path} non écrit, séances dans {store.cat.path}")
+    else:
+        print(f"[info] Écriture : {out_path}")
+        xlsx_io.write_rows(out_path, table.columns, table.rows(screenings))
+    store.cat.replace_screenings([table.as_dict(s) for s in screenings])
+    if complete:
+        m.save()
+        journal.mark_complete(work / JOURNAL_NAME)
     print("[done] Enrich terminé.")
 
 
@@ -5,7 +5,8 @@
 excel_to_json.py — Convertit work/enriched.xlsx vers public/data/programme.json
 
 - Import incrémental robuste :
-  1) Charge le JSON existant et NE GARDE QUE les séances dont la date >= aujourd'hui (heure ignorée).
+  1) Charge le JSON existant et NE GARDE QUE les séances dont la date >= aujourd'hui (heure ignorée) ;
+     les séances passées sont déplacées dans l'archive mensuelle (public/data/archive, cf. archive.py).
   2) Ajoute TOUTES les lignes de l'Excel sans filtrage, en écrasant sur collision de clé.
   3) Trie chronologiquement et écrit le JSON final.
 
@@ -14,14 +15,24 @@ excel_to_json.py — Convertit work/enriched.xlsx vers public/data/programme.jso
 - FIX : la colonne "prix" est acceptée quelle que soit sa casse ("Prix", "PRIX") et
         les alias "recompense(s)", "récompense(s)" sont aussi supportés.
 - Parsing date/heure déterministe (ISO prioritaire, puis DD/MM/YYYY), pour éviter inversions jour/mois.
+- Vues précalculées dans la même passe (public/data/views : today, semaines, films, index) — cf. views.py
+- --from-catalogue : lit les séances dans le catalogue SQLite (work/catalogue.sqlite, une requête)
+  au lieu de work/enriched.xlsx ; même résultat, fiches films à jour du catalogue
 """
 
 import json
+import os
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
 import re
 
+import archive
+import catalogue
+import manifest
+import metrics
+import views
+
 # Emplacements
 IN_XLSX  = Path("work/enriched.xlsx")
 OUT_JSON = Path("public/data/programme.json")
@@ -31,7 +42,7 @@ FIELDS_TO_KEEP = [
     "datetime_local","date","heure",
     "titre","titre_original","realisateur","acteurs_principaux",
     "genres","duree_min","annee","pays","version",
-    "tarif","prix","categorie","commentaire",
+    "tarif","prix","categorie","commentaire","evenement",
     "synopsis","affiche_url","backdrop_url","backdrops",
     "trailer_url","tmdb_id","imdb_id",
     "allocine_url"
@@ -176,62 +187,129 @@ def row_to_obj(r: pd.Series) -> dict:
 
     return obj
 
-def drop_past(items: list, mode: str) -> list:
+def split_past(items: list, mode: str):
     """
-    Supprime les séances passées si demandé.
+    Sépare les séances à venir des séances passées → (à venir, passées).
     mode = 'date' (date < aujourd'hui) ou 'datetime' (dt < maintenant).
     """
     now = pd.Timestamp.now()
     today = now.normalize().date()
-    kept = []
+    kept, past = [], []
     for obj in items:
         dt = parse_dt(obj)
         if dt is None:
             kept.append(obj)
             continue
         if mode == "datetime":
-            if dt >= now:
-                kept.append(obj)
+            (kept if dt >= now else past).append(obj)
         else:  # 'date'
-            if dt.date() >= today:
-                kept.append(obj)
+            (kept if dt.date() >= today else past).append(obj)
+    return kept, past
+
+def drop_past(items: list, mode: str) -> list:
+    """Supprime les séances passées (sans les archiver)."""
+    return split_past(items, mode)[0]
+
+def archive_past(items: list, mode: str = "date") -> list:
+    """Déplace les séances passées dans l'archive mensuelle ; retourne les séances à venir."""
+    kept, past = split_past(items, mode)
+    by_month = {}
+    for obj in past:
+        by_month.setdefault(parse_dt(obj).strftime("%Y-%m"), []).append(obj)
+    for month, objs in sorted(by_month.items()):
+        archive.merge_into(month, objs, key=make_key, sort=sort_items)
+    if past:
+        print(f"[info] {len(past)} séance(s) passée(s) archivée(s) : {', '.join(sorted(by_month))}")
+    metrics.count("archived", len(past))
     return kept
 
-def main():
-    # 0) Charger l’Excel (obligatoire)
-    if not IN_XLSX.exists():
-        raise SystemExit(f"[ERREUR] {IN_XLSX} introuvable.")
-    df = pd.read_excel(IN_XLSX, sheet_name=0, dtype=str).fillna("")
+def sort_items(items: list) -> list:
+    """Tri chronologique (les items sans date parsable partent à la fin)."""
+    def sort_key(o):
+        dt = parse_dt(o)
+        return dt.to_pydatetime() if dt is not None else datetime(9999, 1, 1)
+    return sorted(items, key=sort_key)
+
+def write_programme(items: list):
+    # écriture atomique : serve.py / le site ne lisent jamais un fichier à moitié écrit
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    tmp = OUT_JSON.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, OUT_JSON)
+    views.write_views(items)
 
+def is_exported(r) -> bool:
+    """Les séances scolaires (SCOL) ne sont pas publiées."""
+    return r.get("Categorie", "") != "SCOL"
+
+def merge_programme(objs: list) -> list:
+    """Programme existant + objs (écrasent sur même clé), séances à venir seulement, trié."""
     merged: dict[str, dict] = {}
 
-    # 1) Charger l'existant et NE GARDER QUE les séances dont la date >= aujourd'hui (heure ignorée)
+    # 1) Charger l'existant et NE GARDER QUE les séances dont la date >= aujourd'hui (heure ignorée),
+    #    les séances passées partent dans l'archive mensuelle
     existing = load_existing()
     if existing:
-        for x in drop_past(existing, mode="date"):
+        kept = archive_past(existing, mode="date")
+        metrics.count("existing_kept", len(kept))
+        metrics.count("existing_dropped", len(existing) - len(kept))
+        for x in kept:
             merged[make_key(x)] = x
 
-    # 2) Ajouter / écraser avec l'Excel (on ne filtre PAS l'Excel)
-    for _, r in df.iterrows():
-        if r['Categorie'] != 'SCOL' :
-            obj = row_to_obj(r)
-            merged[make_key(obj)] = obj
+    # 2) Ajouter / écraser avec les nouvelles séances à venir ; les passées vont aussi à l'archive
+    for obj in archive_past(objs, mode="date"):
+        merged[make_key(obj)] = obj
 
     items = list(merged.values())
+    metrics.set_rows(rows_out=len(items))
 
     # 3) Tri chronologique (les items sans date parsable partent à la fin)
-    def sort_key(o):
-        dt = parse_dt(o)
-        return dt.to_pydatetime() if dt is not None else datetime(9999, 1, 1)
-    items.sort(key=sort_key)
+    return sort_items(items)
+
+@metrics.instrumented("export")
+def main(force=False, from_catalogue=False):
+    # 0) Charger l’Excel (obligatoire), ou les séances du catalogue
+    source = catalogue.CATALOGUE_PATH if from_catalogue else IN_XLSX
+    if not source.exists():
+        raise SystemExit(f"[ERREUR] {source} introuvable.")
+    if from_catalogue:
+        m = manifest.for_stage("export", {"source": "catalogue"}, inputs=[source])
+    else:
+        m = manifest.for_stage("export", {})
+    if not force and m.is_fresh():
+        print(manifest.skip_message(m))
+        metrics.count("skipped")
+        return
+    if from_catalogue:
+        cat = catalogue.Catalogue(source)
+        df = cat.programme_frame()
+        cat.close()
+    else:
+        df = pd.read_excel(IN_XLSX, sheet_name=0, dtype=str).fillna("")
+    metrics.set_rows(rows_in=len(df))
+
+    # 1-3) Existant à venir + Excel (on ne filtre PAS l'Excel), tri chronologique
+    objs = [row_to_obj(r) for _, r in df.iterrows() if is_exported(r)]
+    items = merge_programme(objs)
 
     # 4) Écriture
-    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+    write_programme(items)
+    m.save()
 
     print(f"[done] écrit: {OUT_JSON}  ({len(items)} séances)")
     print("[info] logique: (existant filtré aux >= aujourd'hui) + Excel (écrase sur même clé) ; tri chronologique")
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", action="store_true", help="profil cProfile dans work/profiles/")
+    p.add_argument("--force", action="store_true", help="relancer même si l'entrée n'a pas changé")
+    p.add_argument("--from-catalogue", dest="from_catalogue", action="store_true",
+                   help="lire les séances dans work/catalogue.sqlite au lieu de work/enriched.xlsx")
+    args = p.parse_args()
+    if args.profile:
+        import profiling
+        profiling.run("export", main, args.force, args.from_catalogue)
+    else:
+        main(args.force, args.from_catalogue)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+film_store.py — Magasin des films déjà résolus, partagé entre exécutions.
+
+- Adossé au catalogue SQLite (catalogue.py, work/catalogue.sqlite) : tables films, titres,
+  decisions ; chaque recherche est une requête indexée locale
+- Clé d'un titre : titre de recherche (titles.py) en minuscules, espaces réduits,
+  + année indicative → film (tmdb_id), avec son origine ("enrich", "prewarm", "operateur")
+- enrich consulte le magasin avant toute recherche TMDB : un film déjà résolu (exécution
+  précédente, prewarm.py, choix de l'opérateur) ne coûte ni appel ni choix interactif ;
+  un id explicite du classeur (TMDB / IMDb) est cherché directement dans le catalogue
+- Titres ambigus en attente : candidats TMDB conservés pour que l'opérateur tranche
+  à l'avance (python prewarm.py --decide) ; le choix reste dans l'historique des décisions
+- Une fiche incomplète (a_completer) est enregistrée au catalogue mais pas associée
+  au titre : elle sera recherchée à nouveau
+- Ancien work/films.json : importé au premier chargement
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import catalogue
+from model import Film, film_from_dict
+
+STORE_PATH = catalogue.CATALOGUE_PATH
+LEGACY_JSON = Path("work/films.json")
+
+
+def key_of(title: str, year: str = "") -> str:
+    key = " ".join(str(title or "").lower().split())
+    year = str(year or "").strip()
+    return f"{key}|{year}" if year else key
+
+
+class FilmStore:
+    def __init__(self, path: Path = STORE_PATH):
+        self.cat = catalogue.Catalogue(path)
+        legacy = Path(path).parent / LEGACY_JSON.name
+        if legacy.exists() and self.cat.count_films() == 0:
+            self._import_json(legacy)
+
+    @classmethod
+    def load(cls, path: Path = STORE_PATH) -> "FilmStore":
+        return cls(path)
+
+    def _import_json(self, path: Path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError as e:
+            print(f"[warn] {path} illisible, non importé : {e}")
+            return
+        for key, entry in (data.get("films") or {}).items():
+            film = film_from_dict(entry)
+            if self.cat.put_film(film) is not None and not film.a_completer:
+                self.cat.link_title(key, film.tmdb_id, entry.get("origine", ""))
+        for key, entry in (data.get("pending") or {}).items():
+            self.cat.add_pending(key, entry["titre"], entry["recherche"], entry.get("annee_indice", ""),
+                                 entry.get("candidats") or [])
+        print(f"[info] {path} importé dans {self.cat.path}")
+
+    def get(self, title: str, year: str = "") -> Optional[Film]:
+        return self.cat.film_for_key(key_of(title, year))
+
+    def get_explicit(self, film: Film) -> Optional[Film]:
+        """Film désigné par l'id du classeur (TMDB, sinon IMDb), s'il est au catalogue et complet."""
+        found = self.cat.film(film.tmdb_id) if (film.tmdb_id or "").strip() else self.cat.film_by_imdb(film.imdb_id)
+        return found if found is not None and not found.a_completer else None
+
+    def put(self, title: str, year: str, film: Film, origin: str):
+        if self.cat.put_film(film) is None or film.a_completer:
+            return
+        key = key_of(title, year)
+        self.cat.link_title(key, film.tmdb_id, origin)
+        self.cat.drop_pending(key)
+
+    def put_film(self, film: Film):
+        self.cat.put_film(film)
+
+    def is_known(self, key: str) -> bool:
+        return self.cat.is_known(key)
+
+    def add_pending(self, title: str, year: str, raw: str, candidates: list):
+        self.cat.add_pending(key_of(title, year), raw, title, year, candidates)
+
+    def pending(self) -> dict:
+        return self.cat.pending()
+
+    def decide(self, key: str, title: str, year: str, film: Film):
+        """Choix de l'opérateur pour un titre en attente."""
+        self.cat.decide(key, film.tmdb_id)
+        self.put(title, year, film, "operateur")
+
+    def count_films(self) -> int:
+        return self.cat.count_films()
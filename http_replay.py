@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+http_replay.py — Enregistrement / rejeu des appels HTTP (TMDB, Wikidata) en "cassettes".
+
+- record : les réponses réelles sont enregistrées dans work/cassettes/<hôte>/<sha1>.json
+- replay : les réponses sont servies depuis les cassettes, sans réseau ni clé TMDB,
+           avec latence artificielle et injection d'erreurs 5xx / 429 (Retry-After)
+- Le rejeu passe par la politique Retry de la session, préfixe par préfixe (comme en réel,
+  Wikidata compris) : les 429/5xx injectés sont donc réessayés, puis remontent en RetryError
+- La clé TMDB (api_key) ne fait partie ni de la clé de cassette ni du fichier écrit
+
+Utilisation : enrich.py --http record|replay [--cassettes DIR] [--latency 0.2]
+              [--error-rate 0.05] [--rate-limit-rate 0.05]
+"""
+
+import hashlib, json, random, threading, time
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.response import HTTPResponse
+
+CASSETTE_DIR = Path("work/cassettes")
+MODES = ("live", "record", "replay")
+SECRET_PARAMS = ("api_key",)
+
+
+def redact_url(url: str) -> str:
+    """URL canonique sans secrets : paramètres triés, api_key retirée."""
+    u = urlsplit(url)
+    q = sorted((k, v) for k, v in parse_qsl(u.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    return urlunsplit((u.scheme, u.netloc, u.path, urlencode(q), ""))
+
+
+def cassette_path(root: Path, method: str, url: str) -> Path:
+    clean = redact_url(url)
+    digest = hashlib.sha1(f"{method.upper()} {clean}".encode("utf-8")).hexdigest()
+    return Path(root) / urlsplit(clean).netloc / f"{digest}.json"
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adaptateur réel qui enregistre chaque réponse finale (après retries)."""
+
+    def __init__(self, root: Path, **kwargs):
+        super().__init__(**kwargs)
+        self.root = Path(root)
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        path = cassette_path(self.root, request.method, request.url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "request": {"method": request.method, "url": redact_url(request.url)},
+            "status": resp.status_code,
+            "content_type": resp.headers.get("Content-Type", ""),
+            "body": resp.content.decode(resp.encoding or "utf-8", errors="replace"),
+        }
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.part")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        tmp.replace(path)
+        return resp
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Sert les cassettes sans réseau ; latence et erreurs injectées (graine fixe)."""
+
+    def __init__(self, root: Path, latency: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.root = Path(root)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _serve(self, request):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return 429, {"Retry-After": "1", "Content-Type": "application/json"}, b'{"status_code": 25}'
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 503, {"Content-Type": "application/json"}, b'{"status_message": "injected"}'
+        path = cassette_path(self.root, request.method, request.url)
+        if not path.exists():
+            raise requests.ConnectionError(f"cassette absente : {redact_url(request.url)}", request=request)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["status"], {"Content-Type": data.get("content_type") or "application/json"}, \
+            data["body"].encode("utf-8")
+
+    def send(self, request, **kwargs):
+        retries = self.max_retries
+        while True:
+            status, headers, body = self._serve(request)
+            raw = HTTPResponse(body=BytesIO(body), headers=headers, status=status,
+                               preload_content=False, decode_content=False, retries=retries)
+            if retries.is_retry(request.method, status, "Retry-After" in headers):
+                try:
+                    retries = retries.increment(request.method, request.url, response=raw)
+                except MaxRetryError as e:
+                    raise requests.exceptions.RetryError(e, request=request)
+                retries.sleep(raw)
+                continue
+            return self.build_response(request, raw)
+
+
+def install(session, mode: str, root=CASSETTE_DIR, **replay_opts):
+    """Monte un adaptateur record/replay par préfixe de la session, chacun avec la politique
+    Retry de l'adaptateur qu'il remplace ; retourne celui de "https://"."""
+    if mode not in MODES:
+        raise ValueError(f"mode HTTP inconnu : {mode}")
+    if mode == "live":
+        return None
+    # tous les préfixes montés (y compris ceux propres à un service, cf. make_session)
+    for prefix in set(session.adapters) | {"http://", "https://"}:
+        common = {"max_retries": session.get_adapter(prefix).max_retries,
+                  "pool_connections": 20, "pool_maxsize": 20}
+        if mode == "record":
+            adapter = RecordingAdapter(root, **common)
+        else:
+            adapter = ReplayAdapter(root, **replay_opts, **common)
+        session.mount(prefix, adapter)
+    return session.adapters["https://"]
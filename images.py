@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+images.py — Cache local des affiches / backdrops TMDB (étape optionnelle après l'export).
+
+- Lit public/data/programme.json (écrit par excel_to_json.py)
+- Télécharge UNE fois chaque image retenue (affiche_url, backdrop_url, backdrops)
+  dans un stockage adressé par contenu : public/img/<2 car.>/<sha256>.<ext>
+- Génère des variantes WebP / AVIF à quelques largeurs (Pillow, optionnel)
+- Pool de workers borné ; images et variantes déjà présentes ignorées
+- Réécrit les URLs dans le JSON exporté, et ajoute affiche_sources / backdrop_sources
+  (liste {"type", "srcset"} directement utilisable dans une balise <picture>)
+- En cas d'échec de téléchargement, l'URL TMDB d'origine est conservée
+- Les vues précalculées (views.py) sont régénérées avec les URLs locales
+- localize() : même réécriture pour une partie des séances (refresh.py, après mise à jour
+  des fiches d'un programme déjà passé par cette étape)
+"""
+
+import argparse, hashlib, json, os, threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow absent : on copie les originaux sans variantes
+    Image = None
+    features = None
+
+# Emplacements
+PROGRAMME_JSON = Path("public/data/programme.json")
+IMG_DIR        = Path("public/img")
+INDEX_PATH     = Path("work/images_index.json")
+IMG_BASE_URL   = "img/"       # préfixe des URLs réécrites (relatif à la racine du site)
+
+# Largeurs des variantes par type d'image
+VARIANT_WIDTHS = {
+    "affiche":  (185, 342, 500),
+    "backdrop": (480, 780),
+}
+MAX_WORKERS = 4
+
+CONTENT_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+
+def variant_formats() -> List[str]:
+    """Formats de variantes disponibles avec le Pillow installé (AVIF en premier)."""
+    if Image is None:
+        return []
+    fmts = []
+    try:
+        if features.check("avif"):
+            fmts.append("avif")
+    except Exception:
+        pass
+    if features.check("webp"):
+        fmts.append("webp")
+    return fmts
+
+
+def load_index() -> Dict[str, dict]:
+    if INDEX_PATH.exists():
+        try:
+            with open(INDEX_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+    return {}
+
+
+def save_index(index: Dict[str, dict]):
+    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = INDEX_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, INDEX_PATH)
+
+
+def _store_path(sha: str, ext: str, width: Optional[int] = None) -> Path:
+    name = f"{sha}-w{width}.{ext}" if width else f"{sha}.{ext}"
+    return IMG_DIR / sha[:2] / name
+
+
+def _tmp_path(dest: Path) -> Path:
+    # nom unique par thread : deux URLs peuvent pointer vers le même contenu
+    return dest.with_name(f"{dest.name}.{os.getpid()}-{threading.get_ident()}.part")
+
+
+def _public_url(path: Path, base_url: str) -> str:
+    return base_url + path.relative_to(IMG_DIR).as_posix()
+
+
+def _is_remote(url: str) -> bool:
+    return url.startswith("http://") or url.startswith("https://")
+
+
+def fetch_original(url: str, session) -> Optional[dict]:
+    """Télécharge l'image et la range dans le stockage adressé par contenu."""
+    r = session.get(url)
+    if r.status_code != 200 or not r.content:
+        return None
+    data = r.content
+    sha = hashlib.sha256(data).hexdigest()
+    ctype = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    ext = CONTENT_TYPES.get(ctype) or (Path(url).suffix.lstrip(".").lower() or "jpg")
+    width = 0
+    if Image is not None:
+        try:
+            with Image.open(BytesIO(data)) as im:
+                width = im.width
+        except Exception:
+            pass
+    dest = _store_path(sha, ext)
+    if not dest.exists():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _tmp_path(dest)
+        tmp.write_bytes(data)
+        os.replace(tmp, dest)
+    return {"sha": sha, "ext": ext, "width": width}
+
+
+def make_variants(entry: dict, kind: str, formats: List[str]) -> Dict[str, List[int]]:
+    """Crée les variantes manquantes ; retourne {format: [largeurs disponibles]}."""
+    src = _store_path(entry["sha"], entry["ext"])
+    widths = [w for w in VARIANT_WIDTHS[kind] if not entry.get("width") or w <= entry["width"]]
+    done: Dict[str, List[int]] = {}
+    if not formats or not widths or not src.exists():
+        return done
+    im = None
+    try:
+        for fmt in formats:
+            for w in widths:
+                dest = _store_path(entry["sha"], fmt, w)
+                if not dest.exists():
+                    if im is None:
+                        im = Image.open(src)
+                        im.load()
+                        if im.mode not in ("RGB", "RGBA"):
+                            im = im.convert("RGB")
+                    h = max(1, round(im.height * w / im.width))
+                    tmp = _tmp_path(dest)
+                    im.resize((w, h), Image.LANCZOS).save(tmp, format=fmt.upper(), quality=80)
+                    os.replace(tmp, dest)
+                done.setdefault(fmt, []).append(w)
+    except Exception as e:
+        print(f"[warn] variantes {src.name}: {e}")
+    finally:
+        if im is not None:
+            im.close()
+    return done
+
+
+def process_url(url: str, kind: str, index: Dict[str, dict], formats: List[str], session) -> Optional[dict]:
+    entry = index.get(url)
+    if entry is None or not _store_path(entry["sha"], entry["ext"]).exists():
+        try:
+            entry = fetch_original(url, session)
+        except Exception as e:
+            print(f"[warn] téléchargement {url}: {e}")
+            entry = None
+        if entry is None:
+            return None
+    entry = dict(entry)
+    entry["variants"] = make_variants(entry, kind, formats)
+    return entry
+
+
+def sources_for(entry: dict, base_url: str) -> List[dict]:
+    out = []
+    for fmt, widths in (entry.get("variants") or {}).items():
+        srcset = ", ".join(f"{_public_url(_store_path(entry['sha'], fmt, w), base_url)} {w}w" for w in widths)
+        out.append({"type": f"image/{fmt}", "srcset": srcset})
+    return out
+
+
+def rewrite_item(obj: dict, resolved: Dict[str, dict], base_url: str) -> dict:
+    def local(url):
+        e = resolved.get(url)
+        return _public_url(_store_path(e["sha"], e["ext"]), base_url) if e else url
+
+    for field, kind in (("affiche_url", "affiche"), ("backdrop_url", "backdrop")):
+        url = obj.get(field) or ""
+        e = resolved.get(url)
+        if e:
+            obj[field] = local(url)
+            obj[f"{kind}_sources"] = sources_for(e, base_url)
+    if isinstance(obj.get("backdrops"), list):
+        obj["backdrops"] = [local(u) for u in obj["backdrops"]]
+    return obj
+
+
+def is_local(obj: dict) -> bool:
+    """Séance dont les images ont déjà été réécrites vers le cache local."""
+    url = obj.get("affiche_url") or obj.get("backdrop_url") or ""
+    return bool(url) and not _is_remote(url)
+
+
+def localize(items: list, base_url: str = IMG_BASE_URL, workers: int = MAX_WORKERS) -> tuple:
+    """Télécharge les images distantes de items et réécrit leurs URLs ; retourne (items, résolues, voulues)."""
+    # 1) URLs distinctes à traiter (une seule fois chacune), avec leur type
+    wanted: Dict[str, str] = {}
+    for obj in items:
+        for field, kind in (("affiche_url", "affiche"), ("backdrop_url", "backdrop")):
+            url = obj.get(field) or ""
+            if _is_remote(url):
+                wanted.setdefault(url, kind)
+        for url in obj.get("backdrops") or []:
+            if isinstance(url, str) and _is_remote(url):
+                wanted.setdefault(url, "backdrop")
+
+    formats = variant_formats()
+    if Image is None:
+        print("[info] Pillow absent : originaux copiés, pas de variantes WebP/AVIF")
+    print(f"[info] {len(wanted)} image(s) distincte(s), formats: {', '.join(formats) or '-'}")
+
+    # 2) Téléchargement + variantes, pool borné
+    from enrich import make_session
+    session = make_session(timeout=20)
+    index = load_index()
+    resolved: Dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futs = {url: ex.submit(process_url, url, kind, index, formats, session)
+                for url, kind in wanted.items()}
+        for url, fut in futs.items():
+            entry = fut.result()
+            if entry:
+                resolved[url] = entry
+                index[url] = {k: entry[k] for k in ("sha", "ext", "width")}
+    save_index(index)
+
+    # 3) Réécriture des URLs
+    return [rewrite_item(obj, resolved, base_url) for obj in items], len(resolved), len(wanted)
+
+
+def base_url_in_use() -> str:
+    """Préfixe utilisé par la dernière exécution de l'étape (--base-url)."""
+    import manifest
+    prev = manifest.for_stage("images").load() or {}
+    return (prev.get("params") or {}).get("base_url") or IMG_BASE_URL
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Cache local des images TMDB de programme.json")
+    p.add_argument("--workers", type=int, default=MAX_WORKERS)
+    p.add_argument("--base-url", dest="base_url", default=IMG_BASE_URL)
+    p.add_argument("--force", action="store_true", help="relancer même si programme.json n'a pas changé")
+    args, _ = p.parse_known_args(argv)
+
+    if not PROGRAMME_JSON.exists():
+        raise SystemExit(f"[ERREUR] {PROGRAMME_JSON} introuvable.")
+    import manifest
+    m = manifest.for_stage("images", {"base_url": args.base_url, "formats": variant_formats()})
+    if not args.force and m.is_fresh():
+        print(manifest.skip_message(m))
+        return
+    with open(PROGRAMME_JSON, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    items, n_resolved, n_wanted = localize(items, args.base_url, args.workers)
+    tmp = PROGRAMME_JSON.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, PROGRAMME_JSON)
+    import views
+    views.write_views(items)   # vues avec les URLs locales
+    if n_resolved == n_wanted:
+        m.save()   # échecs de téléchargement : on retentera au prochain lancement
+
+    print(f"[done] images locales: {n_resolved}/{n_wanted}  → {IMG_DIR}")
+
+
+if __name__ == "__main__":
+    main()
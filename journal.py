@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+journal.py — Journal d'enrichissement en ajout seul (work/enrich_journal.jsonl).
+
+- 1re ligne : en-tête {"type": "header", ...} (empreinte du fichier d'entrée, paramètres,
+  version du code et des règles de titres)
+- puis une ligne JSON par ligne enrichie : {"type": "row", "i": index, "row": {colonne: valeur}}
+- exécution menée à bout : dernière ligne {"type": "end"} ; un journal terminé n'a rien
+  à reprendre (is_incomplete → False, la GUI ne coche plus "reprendre")
+- chaque écriture est flushée + fsync : survit à un crash ou une mise en veille
+- reprise (--resume) : si l'en-tête correspond, les lignes journalisées sont réappliquées
+  et l'enrichissement continue à la première ligne non traitée ;
+  une dernière ligne tronquée (écriture interrompue) est ignorée
+- les lignes en erreur ne sont pas journalisées : elles sont retentées à la reprise
+"""
+
+import hashlib, json, os
+from pathlib import Path
+from typing import Dict
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_journal(path: Path):
+    """Retourne (en-tête, {index: ligne}, terminé) ; lignes illisibles ignorées."""
+    header, rows, complete = None, {}, False
+    if not path.exists():
+        return header, rows, complete
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("type") == "header":
+                header = rec
+            elif rec.get("type") == "row":
+                rows[int(rec["i"])] = rec["row"]
+            elif rec.get("type") == "end":
+                complete = True
+    return header, rows, complete
+
+
+def is_incomplete(path: Path) -> bool:
+    """Journal d'une exécution interrompue (il y a quelque chose à reprendre)."""
+    last = ""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    last = line
+    except OSError:
+        return False
+    try:
+        return bool(last) and json.loads(last).get("type") != "end"
+    except ValueError:
+        return True     # dernière ligne tronquée : exécution interrompue
+
+
+def mark_complete(path: Path):
+    """Exécution menée à bout (sorties écrites) : le journal n'est plus à reprendre."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "end"}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class Journal:
+    def __init__(self, path: Path, header: dict, resume: bool = False):
+        self.path = Path(path)
+        self.done: Dict[int, dict] = {}
+        header = {"type": "header", **header}
+        old_header, rows, complete = read_journal(self.path) if resume else (None, {}, False)
+        if resume and old_header is not None:
+            if complete:
+                print("[info] journal d'une exécution terminée : rien à reprendre, on repart de zéro")
+            elif old_header == header:
+                self.done = rows
+            else:
+                print("[warn] journal d'une autre entrée / d'autres paramètres / d'une autre version : "
+                      "reprise impossible, on repart de zéro")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.done:
+            # on complète le journal existant
+            self._f = open(self.path, "a", encoding="utf-8")
+            self._f.write("\n")  # isole une éventuelle dernière ligne tronquée
+        else:
+            self._f = open(self.path, "w", encoding="utf-8")
+            self._write(header)
+
+    def _write(self, rec: dict):
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def append(self, i: int, row: dict):
+        self.done[i] = row
+        self._write({"type": "row", "i": i, "row": row})
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+"""
+manifest.py — Étapes "à jour" façon make, par empreinte de contenu.
+
+- Une étape réussie écrit work/manifests/<étape>.json :
+  empreintes sha256 des entrées et des sorties, version du code, paramètres
+- Au lancement suivant, l'étape est passée si rien n'a changé :
+  mêmes entrées (contenu, pas la date), même code, mêmes paramètres, sorties présentes
+- Classeurs .xlsx : empreinte des feuilles, hors docProps/ (date de création réécrite
+  à chaque enregistrement) : une étape qui réécrit la même chose ne relance pas l'aval
+- Une entrée qui est aussi une sortie (images réécrit programme.json) est à jour
+  si elle correspond à la sortie enregistrée
+- normalize / export dépendent aussi de la date du jour (année des dates, séances passées)
+- --force (ou la case "forcer" de la GUI) ignore le manifeste
+- stale_stages() : étapes à relancer (la GUI s'en sert pour pré-cocher les cases)
+- Une étape interrompue / incomplète n'écrit pas de manifeste : elle sera relancée
+"""
+
+import hashlib, json, os, sys, zipfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from journal import file_sha256
+
+MANIFEST_DIR = Path("work/manifests")
+SRC_DIR = Path(__file__).resolve().parent
+
+STAGES = ("normalize", "enrich", "export", "images")
+
+# entrées / sorties par défaut de chaque étape (relatives au répertoire de travail)
+STAGE_IO = {
+    "normalize": (["input/source.xlsx"], ["work/normalized.xlsx", "work/prochainement.json"]),
+    "enrich":    (["work/normalized.xlsx"], ["work/enriched.xlsx"]),
+    "export":    (["work/enriched.xlsx"], ["public/data/programme.json", "public/data/views/index.json"]),
+    "images":    (["public/data/programme.json"], ["public/data/programme.json"]),
+}
+DATED_STAGES = ("normalize", "export")
+
+# modules dont dépend chaque étape (version du code = empreinte de leurs sources)
+STAGE_CODE = {
+    "normalize": ("normalize.py", "xlsx_io.py"),
+    "enrich":    ("enrich.py", "http_replay.py", "titles.py", "model.py", "film_store.py", "catalogue.py",
+                  "xlsx_io.py"),
+    "export":    ("excel_to_json.py", "views.py", "archive.py", "catalogue.py"),
+    "images":    ("images.py", "views.py"),
+}
+
+
+def code_version(stage: str) -> str:
+    h = hashlib.sha256()
+    for name in STAGE_CODE.get(stage, ()):
+        path = SRC_DIR / name
+        if path.exists():
+            h.update(name.encode("utf-8"))
+            h.update(path.read_bytes())
+    if getattr(sys, "frozen", False):
+        # exécutable PyInstaller : sources absentes, on se fie à l'exécutable
+        st = os.stat(sys.executable)
+        h.update(f"{sys.executable}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def content_hash(path: Path) -> str:
+    if path.suffix.lower() == ".xlsx":
+        try:
+            h = hashlib.sha256()
+            with zipfile.ZipFile(path) as z:
+                for name in sorted(z.namelist()):
+                    if not name.startswith("docProps/"):
+                        h.update(name.encode("utf-8"))
+                        h.update(z.read(name))
+            return h.hexdigest()
+        except zipfile.BadZipFile:
+            pass
+    return file_sha256(path)
+
+
+class StageManifest:
+    """
+    params=None : paramètres non comparés (vérification depuis la GUI, qui lance
+    les étapes avec leurs valeurs par défaut).
+    """
+    def __init__(self, stage: str, inputs: list, outputs: list, params: Optional[dict] = None,
+                 root: Path = Path(".")):
+        self.stage = stage
+        self.root = Path(root)
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = json.loads(json.dumps(params)) if params is not None else None
+        self.day = date.today().isoformat() if stage in DATED_STAGES else None
+        self.path = self.root / MANIFEST_DIR / f"{stage}.json"
+        self.reason = ""
+        # entrées figées au début de l'étape (une étape peut réécrire son entrée)
+        self._input_hashes = self._hashes(self.inputs)
+
+    def _key(self, p: Path) -> str:
+        # clés relatives au répertoire de travail : CLI et GUI partagent le manifeste
+        try:
+            return Path(os.path.relpath(p, self.root)).as_posix()
+        except ValueError:  # autre lecteur (Windows)
+            return str(p)
+
+    def _hashes(self, paths: Iterable[Path]) -> Dict[str, Optional[str]]:
+        return {self._key(p): (content_hash(p) if p.exists() else None) for p in paths}
+
+    def load(self) -> Optional[dict]:
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def is_fresh(self) -> bool:
+        """True si l'étape peut être passée ; sinon self.reason explique pourquoi."""
+        old = self.load()
+        if old is None:
+            self.reason = "jamais exécutée"
+            return False
+        if old.get("code") != code_version(self.stage):
+            self.reason = "code modifié"
+            return False
+        if self.params is not None and old.get("params") != self.params:
+            self.reason = "paramètres modifiés"
+            return False
+        if old.get("day") != self.day:
+            self.reason = "nouvelle journée"
+            return False
+        for p in self.outputs:
+            if not p.exists():
+                self.reason = f"sortie absente : {p}"
+                return False
+        old_in, old_out = old.get("inputs", {}), old.get("outputs", {})
+        for p, h in self._input_hashes.items():
+            if h is None:
+                self.reason = f"entrée absente : {p}"
+                return False
+            if h != old_in.get(p) and h != old_out.get(p):
+                self.reason = f"entrée modifiée : {p}"
+                return False
+        self.reason = "à jour"
+        return True
+
+    def save(self):
+        data = {
+            "stage": self.stage,
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "code": code_version(self.stage),
+            "params": self.params or {},
+            "day": self.day,
+            "inputs": self._input_hashes,
+            "outputs": self._hashes(self.outputs),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+def for_stage(stage: str, params: Optional[dict] = None, root=None,
+              inputs: list = None, outputs: list = None) -> StageManifest:
+    root = Path(root) if root else Path(".")
+    ins, outs = STAGE_IO[stage]
+    return StageManifest(stage,
+                         inputs if inputs is not None else [root / p for p in ins],
+                         outputs if outputs is not None else [root / p for p in outs],
+                         params, root=root)
+
+
+def stale_stages(root=None) -> list:
+    """Étapes à relancer, dans l'ordre ; une étape en aval d'une étape à relancer l'est aussi."""
+    stale, upstream = [], False
+    for stage in STAGES:
+        if upstream or not for_stage(stage, root=root).is_fresh():
+            upstream = True
+            stale.append(stage)
+    return stale
+
+
+def skip_message(m: StageManifest) -> str:
+    return f"[skip] {m.stage} : entrées inchangées, sortie précédente réutilisée (--force pour relancer)"
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+metrics.py — Instrumentation du pipeline et rapport d'exécution work/run_report.json.
+
+- stage(name) : mesure le temps mural d'une étape ; rows_in / rows_out renseignés par l'étape
+- request(endpoint, seconds, status, retries) : compteurs + histogramme de latence par endpoint
+  (search, details, credits, videos, images, sparql, ...)
+- cache(name, hit) : taux de succès des caches
+- prompt_wait(seconds) : temps passé à attendre un choix interactif
+- instrumented(name) : décorateur des main() d'étape (stage + save)
+- save() : fusionne les étapes de ce processus dans work/run_report.json
+  (chaque étape garde sa dernière exécution) puis affiche un résumé d'un écran
+"""
+
+import functools, json, threading, time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+REPORT_PATH = Path("work/run_report.json")
+
+# bornes supérieures des classes de latence (ms)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_lock = threading.Lock()
+_stages: dict[str, dict] = {}
+_current: Optional[str] = None
+
+
+def _new_stage(name: str) -> dict:
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_s": 0.0,
+        "rows_in": None,
+        "rows_out": None,
+        "endpoints": {},
+        "caches": {},
+        "prompts": {"count": 0, "wait_s": 0.0},
+        "counters": {},
+    }
+
+
+def _stage_data() -> dict:
+    # appels hors de toute étape (ex. import, tests manuels) : section "other"
+    name = _current or "other"
+    if name not in _stages:
+        _stages[name] = _new_stage(name)
+    return _stages[name]
+
+
+@contextmanager
+def stage(name: str):
+    """Mesure une étape ; le dict produit accepte rows_in / rows_out."""
+    global _current
+    with _lock:
+        _stages[name] = data = _new_stage(name)
+        previous, _current = _current, name
+    t0 = time.perf_counter()
+    try:
+        yield data
+    finally:
+        with _lock:
+            data["wall_s"] = round(time.perf_counter() - t0, 3)
+            _current = previous
+
+
+def set_rows(rows_in=None, rows_out=None):
+    """Renseigne les lignes entrée / sortie de l'étape en cours."""
+    with _lock:
+        data = _stage_data()
+        if rows_in is not None:
+            data["rows_in"] = rows_in
+        if rows_out is not None:
+            data["rows_out"] = rows_out
+
+
+def instrumented(name: str):
+    """Décorateur pour les main() d'étape : mesure + écriture du rapport (même en cas d'erreur)."""
+    def deco(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                with stage(name):
+                    return func(*args, **kwargs)
+            finally:
+                save()
+        return wrapper
+    return deco
+
+
+def request(endpoint: str, seconds: float, status=None, retries: int = 0):
+    ms = seconds * 1000.0
+    with _lock:
+        ep = _stage_data()["endpoints"].setdefault(endpoint, {
+            "count": 0, "errors": 0, "retries": 0, "total_s": 0.0, "max_ms": 0.0,
+            "histogram_ms": {str(b): 0 for b in LATENCY_BUCKETS_MS} | {"inf": 0},
+        })
+        ep["count"] += 1
+        ep["retries"] += retries
+        ep["total_s"] += seconds
+        ep["max_ms"] = max(ep["max_ms"], round(ms, 1))
+        if status is None or status >= 400:
+            ep["errors"] += 1
+        bucket = next((str(b) for b in LATENCY_BUCKETS_MS if ms <= b), "inf")
+        ep["histogram_ms"][bucket] += 1
+
+
+@contextmanager
+def timed_request(endpoint: str):
+    """Chronomètre un appel HTTP ; l'appelant renseigne info["response"] si disponible."""
+    info = {"response": None}
+    t0 = time.perf_counter()
+    try:
+        yield info
+    finally:
+        r = info["response"]
+        status = getattr(r, "status_code", None)
+        retries = 0
+        hist = getattr(getattr(getattr(r, "raw", None), "retries", None), "history", None)
+        if hist:
+            retries = len(hist)
+        request(endpoint, time.perf_counter() - t0, status, retries)
+
+
+def cache(name: str, hit: bool):
+    with _lock:
+        c = _stage_data()["caches"].setdefault(name, {"hits": 0, "misses": 0})
+        c["hits" if hit else "misses"] += 1
+
+
+def prompt_wait(seconds: float):
+    with _lock:
+        p = _stage_data()["prompts"]
+        p["count"] += 1
+        p["wait_s"] = round(p["wait_s"] + seconds, 3)
+
+
+def count(name: str, n: int = 1):
+    with _lock:
+        c = _stage_data()["counters"]
+        c[name] = c.get(name, 0) + n
+
+
+def _finalize(data: dict) -> dict:
+    out = json.loads(json.dumps(data))
+    for ep in out["endpoints"].values():
+        ep["total_s"] = round(ep["total_s"], 3)
+        ep["mean_ms"] = round(1000.0 * ep["total_s"] / ep["count"], 1) if ep["count"] else 0.0
+    for c in out["caches"].values():
+        total = c["hits"] + c["misses"]
+        c["hit_rate"] = round(c["hits"] / total, 3) if total else None
+    return out
+
+
+def load_report(path: Path = REPORT_PATH) -> dict:
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except Exception:
+            pass
+    return {}
+
+
+def save(path: Path = REPORT_PATH, quiet: bool = False) -> dict:
+    """Fusionne les étapes mesurées dans le rapport JSON existant."""
+    report = load_report(path)
+    with _lock:
+        stages = {name: _finalize(d) for name, d in _stages.items()}
+    report.setdefault("stages", {}).update(stages)
+    report["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    tmp.replace(path)
+    if not quiet:
+        print(summary(report))
+    return report
+
+
+def reset():
+    global _current
+    with _lock:
+        _stages.clear()
+        _current = None
+
+
+def summary(report: dict) -> str:
+    lines = [f"=== Rapport d'exécution ({REPORT_PATH}) ==="]
+    for name, st in (report.get("stages") or {}).items():
+        rows = ""
+        if st.get("rows_in") is not None:
+            rows = f"  lignes {st['rows_in']} → {st.get('rows_out')}"
+        lines.append(f"{name:<10} {st.get('wall_s', 0):>8.2f} s{rows}  ({st.get('started_at', '')})")
+        for ep_name, ep in sorted(st.get("endpoints", {}).items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"    {ep_name:<9} n={ep['count']:<5} total={ep['total_s']:>7.2f} s"
+                         f"  moy={ep.get('mean_ms', 0):>6.1f} ms  max={ep['max_ms']:>7.1f} ms"
+                         f"  retries={ep['retries']}  erreurs={ep['errors']}")
+        for c_name, c in st.get("caches", {}).items():
+            rate = c.get("hit_rate")
+            lines.append(f"    cache {c_name:<10} {c['hits']}/{c['hits'] + c['misses']}"
+                         f"  ({'-' if rate is None else f'{rate:.0%}'})")
+        pr = st.get("prompts") or {}
+        if pr.get("count"):
+            lines.append(f"    prompts   n={pr['count']}  attente={pr['wait_s']:.1f} s")
+        for k, v in (st.get("counters") or {}).items():
+            lines.append(f"    {k:<15} {v}")
+    return "\n".join(lines)
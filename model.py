@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+model.py — Modèle compact des séances et des films pour l'enrichissement.
+
+- Film : champs TMDB / Wikidata (identiques pour toutes les séances d'un film)
+- Screening : champs propres à la séance + autres colonnes du classeur (tuple) + Film
+- dataclasses à __slots__ : ni dict par instance, ni Series pandas par ligne
+- Table : correspondance colonnes du classeur ↔ attributs, calculée une fois par fichier ;
+  sortie en flux ligne à ligne (rows → xlsx_io), dans l'ordre des colonnes d'origine
+"""
+
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+
+
+@dataclass(slots=True)
+class Film:
+    titre: str = ""
+    titre_original: str = ""
+    realisateur: str = ""
+    acteurs_principaux: str = ""
+    genres: str = ""
+    annee: str = ""
+    pays: str = ""
+    duree_min: str = ""
+    synopsis: str = ""
+    affiche_url: str = ""
+    backdrop_url: str = ""
+    backdrops: str = ""
+    trailer_url: str = ""
+    tmdb_id: str = ""
+    imdb_id: str = ""
+    allocine_url: str = ""
+    a_completer: str = ""        # recherches optionnelles passées (mode dégradé) : "allocine,videos,..."
+
+
+@dataclass(slots=True)
+class Screening:
+    datetime_local: str = ""
+    date: str = ""
+    heure: str = ""
+    version: str = ""
+    tarif: str = ""
+    categorie: str = ""
+    commentaire: str = ""
+    prix: str = ""
+    evenement: str = ""                  # titles.py : "Avant-première", "Ciné-club, Débat", ...
+    titre_recherche: str = ""            # titre nettoyé envoyé à TMDB
+    annee_indice: str = ""               # année lue dans le titre source ("(1982)")
+    extra: tuple = ()                   # colonnes du classeur hors modèle (Titre, CM, Source, ...)
+    film: Film = field(default_factory=Film)
+
+
+FILM_FIELDS = [f.name for f in fields(Film)]
+SCREENING_FIELDS = [f.name for f in fields(Screening) if f.name not in ("extra", "film")]
+
+
+def film_from_dict(d: dict) -> Film:
+    return Film(*[str(d.get(k, "") or "") for k in FILM_FIELDS])
+
+
+def film_to_dict(film: Film) -> dict:
+    return {k: getattr(film, k) for k in FILM_FIELDS}
+
+
+class Table:
+    """Colonnes d'un classeur et conversions ligne (valeurs) ↔ Screening."""
+    __slots__ = ("columns", "extra_columns", "_screening_pos", "_film_pos", "_extra_pos", "_getters")
+
+    def __init__(self, columns):
+        self.columns = [str(c) for c in columns]
+        pos = {c: i for i, c in enumerate(self.columns)}
+        self._screening_pos = [pos.get(k) for k in SCREENING_FIELDS]
+        self._film_pos = [pos.get(k) for k in FILM_FIELDS]
+        modelled = set(SCREENING_FIELDS) | set(FILM_FIELDS)
+        self.extra_columns = [c for c in self.columns if c not in modelled]
+        self._extra_pos = [pos[c] for c in self.extra_columns]
+        getters = []
+        for c in self.columns:
+            if c in SCREENING_FIELDS:
+                getters.append(attrgetter(c))
+            elif c in FILM_FIELDS:
+                getters.append(attrgetter(f"film.{c}"))
+            else:
+                i = self.extra_columns.index(c)
+                getters.append(lambda s, i=i: s.extra[i])
+        self._getters = getters
+
+    def screening(self, values) -> Screening:
+        """values : valeurs d'une ligne, dans l'ordre de self.columns."""
+        film = Film(*["" if i is None else values[i] for i in self._film_pos])
+        return Screening(*["" if i is None else values[i] for i in self._screening_pos],
+                         extra=tuple(values[i] for i in self._extra_pos), film=film)
+
+    def screening_from_dict(self, d: dict) -> Screening:
+        return self.screening([d.get(c, "") for c in self.columns])
+
+    def values(self, s: Screening) -> list:
+        return [get(s) for get in self._getters]
+
+    def as_dict(self, s: Screening) -> dict:
+        return dict(zip(self.columns, self.values(s)))
+
+    @classmethod
+    def from_frame(cls, df):
+        """DataFrame (valeurs str) → (Table, [Screening, ...])."""
+        table = cls(df.columns)
+        return table, [table.screening(v) for v in df.itertuples(index=False, name=None)]
+
+    def rows(self, screenings):
+        """Valeurs ligne à ligne, pour un écrivain en flux (xlsx_io)."""
+        return (self.values(s) for s in screenings)
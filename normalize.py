@@ -7,9 +7,19 @@ Entrée :  input/source.xlsx  (Feuil1)
 Sorties :
     - work/normalized.xlsx
     - work/prochainement.json  (liste de textes "prochainement")
+
+Mode lot (archives de saison, plusieurs mois, autres salles) :
+    python normalize.py --batch archives/*.xlsx autre.xlsx:Feuil2 [--all-sheets] [--workers N]
+    - une tâche par (classeur, feuille), exécutées en parallèle (ProcessPoolExecutor)
+    - fusion déterministe dans l'ordre des arguments puis des feuilles
+    - provenance par ligne : colonnes Source / Feuille / Ligne
+    - blocs "prochainement" fusionnés dans le même ordre, sans doublons
 """
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import os
 import re
 from datetime import datetime, time
 from dateutil import parser as dtparser
@@ -18,6 +28,10 @@ import json
 import pandas as pd
 import openpyxl
 
+import manifest
+import metrics
+import xlsx_io
+
 # --- chemins ---
 INPUT_PATH          = Path("input/source.xlsx")
 OUTPUT_PATH         = Path("work/normalized.xlsx")
@@ -34,6 +48,17 @@ COL_PRIX    = 8      # I
 COL_CATEG   = 9      # J
 COL_TARIF   = 10     # K
 COL_COMMENT = 11     # L
+COL_ID      = 13     # N (optionnelle) : id TMDB, tt-id IMDb ou URL TMDB / IMDb du film
+
+NORMALIZED_COLS = [
+    "Date", "Heure", "Titre", "Version", "CM", "Realisateur",
+    "Prix", "Categorie", "Tarif", "Commentaire", "TmdbId", "ImdbId"
+]
+
+PROVENANCE_COLS = ["Source", "Feuille", "Ligne"]
+
+TMDB_URL_RE = re.compile(r"themoviedb\.org/movie/(\d+)")
+IMDB_ID_RE  = re.compile(r"\b(tt\d{7,10})\b")
 
 WEEKDAYS_FR = {"lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"}
 
@@ -124,6 +149,27 @@ def normalize_version(v):
     return "VF"
 
 
+def parse_film_id(x):
+    """
+    Cellule "identifiant" → (tmdb_id, imdb_id), chaînes vides si absente ou non reconnue.
+    Accepte 603, "603", "tt0133093", "https://www.themoviedb.org/movie/603-matrix",
+    "https://www.imdb.com/title/tt0133093/".
+    """
+    if x is None or (isinstance(x, float) and pd.isna(x)):
+        return "", ""
+    if isinstance(x, (int, float)) and not isinstance(x, bool):
+        return (str(int(x)), "") if x > 0 and float(x).is_integer() else ("", "")
+    s = str(x).strip()
+    if s.isdigit():
+        return s, ""
+    m = TMDB_URL_RE.search(s)
+    if m:
+        return m.group(1), ""
+    m = IMDB_ID_RE.search(s)
+    if m:
+        return "", m.group(1)
+    return "", ""
+
 def is_red_background(cell):
     """Retourne True si la cellule Excel a un fond rouge (#FF0000)."""
     fill = cell.fill
@@ -156,19 +202,34 @@ def is_red_background(cell):
 # MAIN
 # ------------------------------------------------------------
 
-def main():
-    if not INPUT_PATH.exists():
-        raise SystemExit(f"❌ Fichier introuvable : {INPUT_PATH}")
+def read_screenings(path=None, sheet=None, provenance=False):
+    """
+    Lit la feuille source → (séances, blocs "prochainement", nombre de lignes brutes).
+    provenance=True : chaque séance porte aussi Source / Feuille / Ligne (n° de ligne Excel).
+    """
+    meta = {}
+    records = list(iter_screenings(path, sheet, provenance, meta))
+    return records, meta["prochainement"], meta["lignes"]
+
+
+def iter_screenings(path=None, sheet=None, provenance=False, meta=None):
+    """
+    Séances de la feuille, produites au fil du parcours (pipeline en flux, cf. stream.py).
+    meta (dict) reçoit "lignes" dès le chargement, puis "prochainement" en fin de parcours.
+    """
+    meta = {} if meta is None else meta
+    path = Path(path or INPUT_PATH)
+    sheet = sheet or SHEET_NAME
 
     # pandas : valeurs
-    raw = pd.read_excel(INPUT_PATH, sheet_name=SHEET_NAME, header=None, dtype=object)
+    raw = pd.read_excel(path, sheet_name=sheet, header=None, dtype=object)
 
     # openpyxl : styles (couleurs)
-    wb = openpyxl.load_workbook(INPUT_PATH, data_only=True)
-    ws = wb[SHEET_NAME]
+    wb = openpyxl.load_workbook(path, data_only=True)
+    ws = wb[sheet]
 
-    records = []
     upcoming_blocks = []   # pour "prochainement"
+    meta["lignes"] = len(raw)
     current_date = None
 
     # raw.index est en général un RangeIndex, mais on l'utilise explicitement
@@ -235,6 +296,7 @@ def main():
             categorie = norm_str(row.get(COL_CATEG))
             tarif = norm_str(row.get(COL_TARIF))
             commentaire = norm_str(row.get(COL_COMMENT))
+            tmdb_id, imdb_id = parse_film_id(row.get(COL_ID))
 
             # --- Normalisation textuelle du champ Tarif ---
             if tarif:
@@ -244,7 +306,7 @@ def main():
                 # Remplacer ADH par Adhérents
                 tarif = re.sub(r"\bADH\b", "Adhérents", tarif, flags=re.IGNORECASE)
 
-            records.append({
+            rec = {
                 "Date": current_date.strftime("%Y-%m-%d"),
                 "Heure": f"{t.hour:02d}:{t.minute:02d}",
                 "Titre": titre,
@@ -255,19 +317,27 @@ def main():
                 "Categorie": categorie,
                 "Tarif": tarif,
                 "Commentaire": commentaire,
-            })
+                "TmdbId": tmdb_id,
+                "ImdbId": imdb_id,
+            }
+            if provenance:
+                rec.update({"Source": path.name, "Feuille": sheet, "Ligne": idx + 1})
+            yield rec
+
+    meta["prochainement"] = upcoming_blocks
 
+
+def write_outputs(records, upcoming_blocks, columns=NORMALIZED_COLS, xlsx=True):
     # --------------------------------------------------------
-    # export des séances
+    # export des séances (xlsx=False : stream --no-xlsx)
     # --------------------------------------------------------
-    df = pd.DataFrame(records, columns=[
-        "Date", "Heure", "Titre", "Version", "CM", 'Realisateur',
-        "Prix", "Categorie", "Tarif", "Commentaire"
-    ])
-
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(OUTPUT_PATH, index=False)
-    print(f"✅ Écrit : {OUTPUT_PATH} ({len(df)} lignes)")
+    if xlsx:
+        n = xlsx_io.write_dicts(OUTPUT_PATH, columns, records)
+        print(f"✅ Écrit : {OUTPUT_PATH} ({n} lignes)")
+    else:
+        n = len(records)
+    metrics.set_rows(rows_out=n)
+    metrics.count("prochainement", len(upcoming_blocks))
 
     # --------------------------------------------------------
     # export "prochainement"
@@ -280,5 +350,113 @@ def main():
     print(f"✅ Écrit : {PROCHAINEMENT_PATH} ({len(upcoming_blocks)} bloc(s))")
 
 
+@metrics.instrumented("normalize")
+def main(force=False):
+    if not INPUT_PATH.exists():
+        raise SystemExit(f"❌ Fichier introuvable : {INPUT_PATH}")
+
+    m = manifest.for_stage("normalize", {"sheet": SHEET_NAME})
+    if not force and m.is_fresh():
+        print(manifest.skip_message(m))
+        metrics.count("skipped")
+        return
+
+    records, upcoming_blocks, n_raw = read_screenings()
+    metrics.set_rows(rows_in=n_raw)
+    write_outputs(records, upcoming_blocks)
+    m.save()
+
+
+# ------------------------------------------------------------
+# Mode lot
+# ------------------------------------------------------------
+def batch_jobs(specs, all_sheets=False):
+    """
+    "classeur.xlsx" ou "classeur.xlsx:Feuille" → [(chemin, feuille), ...] dans l'ordre donné.
+    Sans feuille : Feuil1, ou toutes les feuilles avec all_sheets.
+    """
+    jobs = []
+    for spec in specs:
+        path, sep, sheet = spec.rpartition(":")
+        if not sep or not path or not sheet or sheet.startswith(("\\", "/")):
+            path, sheet = spec, ""   # pas de feuille (ou "C:\..." sous Windows)
+        path = Path(path)
+        if not path.exists():
+            raise SystemExit(f"❌ Fichier introuvable : {path}")
+        if sheet:
+            jobs.append((path, sheet))
+        elif all_sheets:
+            wb = openpyxl.load_workbook(path, read_only=True)
+            jobs.extend((path, name) for name in wb.sheetnames)
+            wb.close()
+        else:
+            jobs.append((path, SHEET_NAME))
+    return jobs
+
+
+def _batch_job(job):
+    # exécuté dans un processus du pool (fonction de module : sérialisable)
+    path, sheet = job
+    return read_screenings(path, sheet, provenance=True)
+
+
+def normalize_batch(jobs, workers=None):
+    """Normalise les tâches en parallèle ; fusion dans l'ordre des tâches."""
+    if len(jobs) <= 1 or workers == 1:
+        results = [_batch_job(j) for j in jobs]
+    else:
+        workers = min(len(jobs), workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_batch_job, jobs))
+
+    records, upcoming_blocks, n_raw = [], [], 0
+    for (path, sheet), (recs, upcoming, n) in zip(jobs, results):
+        print(f"[info] {path.name} [{sheet}] : {len(recs)} séance(s)")
+        records.extend(recs)
+        n_raw += n
+        for u in upcoming:
+            if u not in upcoming_blocks:
+                upcoming_blocks.append(u)
+    return records, upcoming_blocks, n_raw
+
+
+@metrics.instrumented("normalize")
+def main_batch(specs, all_sheets=False, workers=None, force=False):
+    jobs = batch_jobs(specs, all_sheets)
+    m = manifest.for_stage("normalize", {"batch": [[p.as_posix(), s] for p, s in jobs]},
+                           inputs=sorted({p for p, _ in jobs}))
+    if not force and m.is_fresh():
+        print(manifest.skip_message(m))
+        metrics.count("skipped")
+        return
+
+    records, upcoming_blocks, n_raw = normalize_batch(jobs, workers)
+    metrics.set_rows(rows_in=n_raw)
+    metrics.count("sheets", len(jobs))
+    write_outputs(records, upcoming_blocks, NORMALIZED_COLS + PROVENANCE_COLS)
+    m.save()
+
+
+def cli(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", action="store_true", help="profil cProfile dans work/profiles/")
+    p.add_argument("--force", action="store_true", help="relancer même si l'entrée n'a pas changé")
+    p.add_argument("--batch", nargs="+", metavar="CLASSEUR[:FEUILLE]",
+                   help="normaliser plusieurs classeurs / feuilles (avec provenance)")
+    p.add_argument("--all-sheets", dest="all_sheets", action="store_true",
+                   help="--batch : toutes les feuilles des classeurs sans feuille explicite")
+    p.add_argument("--workers", type=int, default=None, help="--batch : processus (défaut : nb de cœurs)")
+    args, _ = p.parse_known_args(argv)
+
+    if args.batch:
+        func, fargs = main_batch, (args.batch, args.all_sheets, args.workers, args.force)
+    else:
+        func, fargs = main, (args.force,)
+    if args.profile:
+        import profiling
+        return profiling.run("normalize", func, *fargs)
+    return func(*fargs)
+
+
 if __name__ == "__main__":
-    main()
+    cli()
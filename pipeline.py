@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pipeline.py — Point d'entrée sans interface graphique (tâches planifiées, scripts).
+
+    python -m pipeline normalize [--batch a.xlsx b.xlsx:Feuil2 --all-sheets --workers N]
+    python -m pipeline enrich [--lang fr-FR --auto-margin 4 --http replay ...]
+    python -m pipeline export [--from-catalogue]
+    python -m pipeline all --no-xlsx   (enrich sans enriched.xlsx, export depuis le catalogue)
+    python -m pipeline images [--workers 4]
+    python -m pipeline all [--images] [--prewarm] [--profile] [--force] [options enrich ...]
+    python -m pipeline all --stream [--workers 4 --queue-size 64]   (normalize/enrich/export en flux)
+    python -m pipeline prewarm [--decide | --list]
+    python -m pipeline refresh [--max-age 7 --limit 50 --dry-run]   (fiches des films publiés)
+    python -m pipeline watch [--interval 1.0] [--once]
+    python -m pipeline serve [--host 127.0.0.1 --port 8765]
+
+- Chaque étape n'importe ses dépendances qu'au moment de s'exécuter
+- Les options non reconnues ici sont transmises à normalize, enrich et images ;
+  chaque étape ne reçoit que celles qu'elle connaît
+- Sans console, les choix ambigus de enrich sont passés (aucun blocage)
+- Une étape dont les entrées n'ont pas changé est passée (cf. manifest.py), sauf --force
+"""
+
+import argparse, sys
+
+STAGES = ("normalize", "enrich", "export", "images")
+
+
+def stage_argv(parser, extra: list) -> list:
+    """extra privé des options que parser ne connaît pas (options d'une autre étape)."""
+    _, unknown = parser.parse_known_args(extra)
+    out, j = [], 0
+    for tok in extra:
+        if j < len(unknown) and tok == unknown[j]:
+            j += 1
+        else:
+            out.append(tok)
+    return out
+
+
+def stage_func(stage: str, extra: list, force: bool = False, from_catalogue: bool = False):
+    """Fonction sans argument qui exécute l'étape (import différé du module)."""
+    force_argv = ["--force"] if force else []
+    if stage == "normalize":
+        import normalize
+        return lambda: normalize.cli(extra + force_argv)
+    if stage == "enrich":
+        import enrich
+        # analyse stricte : seules ses options lui sont transmises (--batch, --workers... vont à normalize)
+        return lambda: enrich.main(argv=stage_argv(enrich.arg_parser(), extra) + force_argv)
+    if stage == "export":
+        import excel_to_json
+        return lambda: excel_to_json.main(force=force, from_catalogue=from_catalogue)
+    if stage == "images":
+        import images
+        return lambda: images.main(extra + force_argv)
+    if stage == "stream":
+        import stream
+        return lambda: stream.main(extra + force_argv)
+    if stage == "prewarm":
+        import prewarm
+        return lambda: prewarm.main(extra)
+    if stage == "refresh":
+        import refresh
+        return lambda: refresh.main(extra)
+    if stage == "watch":
+        import watch
+        return lambda: watch.main(extra)
+    if stage == "serve":
+        import serve
+        return lambda: serve.main(extra)
+    raise ValueError(f"étape inconnue : {stage}")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m pipeline", description="Pipeline programme Ciné Carbonne")
+    p.add_argument("command", choices=STAGES + ("all", "prewarm", "refresh", "watch", "serve"))
+    p.add_argument("--images", action="store_true", help="all : inclure le cache local des images")
+    p.add_argument("--prewarm", action="store_true", help="all : résoudre à l'avance les films 'prochainement'")
+    p.add_argument("--stream", action="store_true", help="all : normalize, enrich et export en flux (stream.py)")
+    p.add_argument("--from-catalogue", dest="from_catalogue", action="store_true",
+                   help="export : lire les séances dans le catalogue SQLite (catalogue.py)")
+    p.add_argument("--no-xlsx", dest="no_xlsx", action="store_true",
+                   help="enrich / all : pas de classeur enrichi ; export depuis le catalogue")
+    p.add_argument("--profile", action="store_true", help="profil cProfile par étape dans work/profiles/")
+    p.add_argument("--force", action="store_true", help="relancer les étapes même si leurs entrées n'ont pas changé")
+    args, extra = p.parse_known_args(argv)
+    if args.no_xlsx:
+        extra = extra + ["--no-xlsx"]
+        args.from_catalogue = True
+
+    if args.command == "all":
+        stages = ((["stream"] if args.stream else ["normalize", "enrich", "export"])
+                  + (["images"] if args.images else [])
+                  + (["prewarm"] if args.prewarm else []))
+    else:
+        stages = [args.command]
+
+    for stage in stages:
+        func = stage_func(stage, extra, args.force, args.from_catalogue)
+        if args.profile:
+            import profiling
+            profiling.run(stage, func)
+        else:
+            func()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
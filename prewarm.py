@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+prewarm.py — Résolution à l'avance des films annoncés "prochainement".
+
+- Lit work/prochainement.json (blocs de texte écrits par normalize), découpe chaque bloc
+  en titres (virgules, points-virgules, retours à la ligne) et les nettoie (titles.py)
+- Titre déjà connu du magasin (film_store.py, catalogue SQLite) ou déjà en attente : rien à faire
+- Sinon recherche TMDB + sélection automatique ; si elle aboutit : fiche complète
+  (détails, crédits, bande-annonce, backdrops, Allociné) enregistrée dans le magasin,
+  la séance sera servie depuis le cache le jour où le film entre au programme
+- Titre ambigu : candidats mis en attente, sans prompt ; l'opérateur tranche avec --decide
+- Aucun résultat : rien n'est enregistré (le titre sera recherché à la programmation)
+- Tâche de fond : lancée par watch.py quand les blocs "prochainement" changent,
+  par "python -m pipeline prewarm", ou par un planificateur
+- Limite connue : un titre contenant une virgule ("Paris, Texas") est coupé en deux,
+  il n'est alors résolu qu'à la programmation
+
+Usage : python prewarm.py [--lang fr-FR] [--auto-margin 4] [--http replay]
+        python prewarm.py --decide      (choix de l'opérateur pour les titres en attente)
+        python prewarm.py --list        (magasin et titres en attente)
+"""
+
+import argparse, json, re, threading
+from pathlib import Path
+
+import film_store
+import metrics
+import titles
+from model import Film, Screening
+
+PROCHAINEMENT_PATH = Path("work/prochainement.json")
+SPLIT_RE = re.compile(r"\s*(?:[,;\n•]|\s/\s)\s*")
+MAX_CANDIDATES = 5
+
+
+def upcoming_titles(blocks) -> list:
+    """Blocs "prochainement" → titres distincts, dans l'ordre d'apparition."""
+    seen, out = set(), []
+    for block in blocks or []:
+        for part in SPLIT_RE.split(str(block)):
+            part = part.strip(" .-–")
+            if not part or "prochainement" in part.lower():
+                continue
+            key = film_store.key_of(part)
+            if key not in seen:
+                seen.add(key)
+                out.append(part)
+    return out
+
+
+def _candidate(c: dict) -> dict:
+    return {"id": int(c["id"]), "title": c.get("title") or "", "original_title": c.get("original_title") or "",
+            "year": (c.get("release_date") or "")[:4], "popularity": c.get("popularity") or 0}
+
+
+def resolve_film(raw: str, title: str, year: str, tmdb_id, args) -> Film:
+    """Fiche complète d'un film dont l'id TMDB est connu (même chemin que l'id explicite d'enrich)."""
+    import enrich
+    s = Screening(titre_recherche=title, annee_indice=year, film=Film(titre=raw, tmdb_id=str(tmdb_id)))
+    return enrich.enrich_row(s, args).film
+
+
+def prewarm(blocks, args, store: film_store.FilmStore = None) -> dict:
+    """Résout les titres à venir absents du magasin ; retourne les compteurs."""
+    import enrich
+    store = store or film_store.FilmStore.load()
+    stats = {"titres": 0, "connus": 0, "resolus": 0, "en_attente": 0, "sans_resultat": 0, "erreurs": 0}
+    for raw in upcoming_titles(blocks):
+        stats["titres"] += 1
+        title, _event, year, _version = titles.clean_title(raw)
+        key = film_store.key_of(title, year)
+        if store.is_known(key):
+            stats["connus"] += 1
+            continue
+        try:
+            cands = (enrich.search_movie(title, args.lang, year or None)
+                     or enrich.search_movie(title, "en-US", year or None))
+            if not cands:
+                stats["sans_resultat"] += 1
+                continue
+            ordered = enrich.rank_candidates(cands, title)
+            picked = enrich.autopick(ordered, title, args.auto_margin)
+            if picked is None:
+                store.add_pending(title, year, raw, [_candidate(c) for c in ordered[:MAX_CANDIDATES]])
+                print(f"[info] prochainement : '{raw}' ambigu, en attente d'un choix ({len(ordered)} candidats)")
+                stats["en_attente"] += 1
+                continue
+            film = resolve_film(raw, title, year, picked["id"], args)
+            store.put(title, year, film, "prewarm")
+            stats["resolus"] += 1
+        except Exception as e:
+            print(f"[warn] prochainement : '{raw}' : {e}")
+            stats["erreurs"] += 1
+    for k in ("resolus", "en_attente", "sans_resultat"):
+        metrics.count(f"prewarm_{k}", stats[k])
+    return stats
+
+
+def decide(args, store: film_store.FilmStore = None):
+    """Console : un choix par titre en attente (0 = passer, q = quitter)."""
+    store = store or film_store.FilmStore.load()
+    for key, entry in store.pending().items():
+        print(f"\nProchainement : {entry['titre']}")
+        for i, c in enumerate(entry["candidats"], 1):
+            orig = f" / {c['original_title']}" if c["original_title"] and c["original_title"] != c["title"] else ""
+            print(f"  {i}. {c['title']}{orig} ({c['year'] or '?'})  [tmdb {c['id']}]")
+        try:
+            ans = input("Choix (0 = passer, q = quitter) : ").strip().lower()
+        except EOFError:
+            break
+        if ans == "q":
+            break
+        if not ans.isdigit() or not 1 <= int(ans) <= len(entry["candidats"]):
+            continue
+        c = entry["candidats"][int(ans) - 1]
+        try:
+            film = resolve_film(entry["titre"], entry["recherche"], entry["annee_indice"], c["id"], args)
+        except Exception as e:
+            print(f"[warn] {entry['titre']} : {e}")
+            continue
+        store.decide(key, entry["recherche"], entry["annee_indice"], film)
+        print(f"[ok] {entry['titre']} → {film.titre} ({film.annee})")
+
+
+_background = None
+
+def start_background(blocks, args):
+    """Pré-résolution dans un thread (watch.py) ; une seule à la fois."""
+    global _background
+    if _background is not None and _background.is_alive():
+        return None
+    def run():
+        try:
+            st = prewarm(blocks, args)
+            if st["resolus"] or st["en_attente"]:
+                print(f"[prewarm] {st['resolus']} film(s) à venir résolu(s), {st['en_attente']} en attente de choix")
+        except Exception as e:
+            print(f"[warn] prewarm : {e}")
+    _background = threading.Thread(target=run, name="prewarm", daemon=True)
+    _background.start()
+    return _background
+
+
+@metrics.instrumented("prewarm")
+def run(args, store: film_store.FilmStore = None):
+    if not PROCHAINEMENT_PATH.exists():
+        print(f"[info] {PROCHAINEMENT_PATH} absent : lancer normalize d'abord")
+        return
+    with open(PROCHAINEMENT_PATH, "r", encoding="utf-8") as f:
+        blocks = json.load(f)
+    st = prewarm(blocks, args, store)
+    print(f"[done] prochainement : {st['titres']} titre(s), {st['connus']} déjà connu(s), "
+          f"{st['resolus']} résolu(s), {st['en_attente']} en attente, {st['sans_resultat']} sans résultat")
+
+
+def main(argv=None):
+    import enrich
+    p = argparse.ArgumentParser(description="Résolution à l'avance des films 'prochainement'")
+    p.add_argument("--lang", dest="lang", default=enrich.LANG_DEFAULT)
+    p.add_argument("--auto-margin", dest="auto_margin", type=float, default=4.0)
+    p.add_argument("--decide", action="store_true", help="trancher les titres ambigus en attente")
+    p.add_argument("--list", action="store_true", help="afficher le magasin et les titres en attente")
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", default="work/cassettes")
+    args, _ = p.parse_known_args(argv)
+
+    store = film_store.FilmStore.load()
+    if args.list:
+        pending = store.pending()
+        print(f"=== {film_store.STORE_PATH} : {store.count_films()} film(s), {len(pending)} en attente ===")
+        for entry in sorted(pending.values(), key=lambda e: e["titre"]):
+            print(f"  ? {entry['titre']}  ({len(entry['candidats'])} candidats)")
+        return
+
+    if args.http_mode != "live":
+        import http_replay
+        http_replay.install(enrich.get_session(), args.http_mode, Path(args.cassettes))
+    if args.http_mode == "replay":
+        enrich.TMDB_API_KEY = enrich.TMDB_API_KEY or "replay"
+
+    if args.decide:
+        decide(args, store)
+    else:
+        run(args, store)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+profiling.py — Profilage cProfile optionnel d'une étape (option --profile / case de la GUI).
+
+- run(stage, func, *args) : exécute func sous cProfile, même si elle lève une exception
+- écrit work/profiles/<étape>-<horodatage>.pstats (pstats, snakeviz, ...)
+- affiche les fonctions les plus coûteuses en fin d'étape
+- cProfile / pstats font partie de la stdlib : fonctionne aussi dans CineCarbonneGUI.exe
+
+NB : seul le thread appelant est profilé (pas les workers des ThreadPoolExecutor).
+"""
+
+import cProfile, pstats
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_DIR = Path("work/profiles")
+TOP_N = 15
+
+
+def top_functions(stats: pstats.Stats, n: int = TOP_N, sort: str = "tottime") -> list:
+    """[(tottime, cumtime, ncalls, "fichier:ligne(fonction)"), ...] triés par coût."""
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append((tt, ct, nc, f"{Path(filename).name}:{line}({func})"))
+    key = 0 if sort == "tottime" else 1
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return rows[:n]
+
+
+def summary(stage: str, stats: pstats.Stats, path: Path, n: int = TOP_N) -> str:
+    lines = [f"=== Profil {stage} : {path} ===",
+             f"{'tottime':>9} {'cumtime':>9} {'ncalls':>9}  fonction"]
+    for tt, ct, nc, where in top_functions(stats, n):
+        lines.append(f"{tt:>9.3f} {ct:>9.3f} {nc:>9}  {where}")
+    return "\n".join(lines)
+
+
+def run(stage: str, func, *args, **kwargs):
+    """Exécute func(*args, **kwargs) sous cProfile et écrit le profil de l'étape."""
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func, *args, **kwargs)
+    finally:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / f"{stage}-{datetime.now():%Y%m%d-%H%M%S}.pstats"
+        prof.dump_stats(str(path))
+        try:
+            print(summary(stage, pstats.Stats(prof), path))
+        except TypeError:
+            # aucune fonction profilée (étape interrompue immédiatement)
+            print(f"[info] profil vide : {path}")
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+refresh.py — Rafraîchit les fiches films des séances déjà publiées (public/data/programme.json).
+
+- Parcourt les séances à venir de programme.json, un film (tmdb_id) à la fois, le plus
+  proche d'abord ; un film est repris si sa fiche est incomplète au catalogue (a_completer,
+  mode dégradé) ou si elle date de plus de --max-age jours (avec les champs qui manquent :
+  bande-annonce, backdrops, synopsis, affiche)
+- La date de mise à jour du catalogue vaut date de vérification : un film sans bande-annonce
+  sur TMDB n'est pas redemandé à chaque exécution et ne consomme pas --limit
+- Par tmdb_id uniquement (chemin id explicite d'enrich) : ni recherche ni choix interactif
+- Requêtes TMDB conditionnelles (If-None-Match / If-Modified-Since) : réponses et validateurs
+  dans work/refresh_cache.json ; un film inchangé ne coûte que des 304 sans corps
+- Un champ déjà renseigné n'est jamais vidé par une réponse plus pauvre
+- programme.json relu juste avant l'écriture puis patché : seuls les champs film des séances
+  concernées changent (écriture atomique + vues, excel_to_json.write_programme) ;
+  fiches mises à jour dans le catalogue (catalogue.py)
+- Programme déjà passé par images.py : les nouvelles URLs TMDB repassent par le cache local
+  (images.localize) ; URLs img/... et affiche_sources / backdrop_sources restent cohérentes
+- Tâche indépendante (planificateur, "python -m pipeline refresh") : jamais sur le chemin
+  critique d'un enrichissement complet
+
+Usage : python refresh.py [--max-age 7] [--limit 50] [--budget 120] [--lang fr-FR] [--dry-run]
+"""
+
+import argparse, json, os, re
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+import film_store
+import metrics
+from model import FILM_FIELDS, Film, Screening, film_from_dict, film_to_dict
+
+CACHE_PATH = Path("work/refresh_cache.json")
+MAX_AGE_DAYS = 7
+LIMIT = 50
+MOVIE_RE = re.compile(r"/movie/(\d+)")
+# champs du site dont l'absence justifie un rafraîchissement
+WATCHED_FIELDS = ("trailer_url", "backdrops", "synopsis", "affiche_url")
+# ajoutés par images.py, recalculés avec les URLs locales
+SOURCES_FIELDS = ("affiche_sources", "backdrop_sources")
+IMAGE_FIELDS = ("affiche_url", "backdrop_url", "backdrops") + SOURCES_FIELDS
+
+
+class ConditionalCache:
+    """Réponses TMDB + validateurs (ETag, Last-Modified), pour enrich.HTTP_CACHE."""
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except ValueError as e:
+                print(f"[warn] {self.path} illisible, ignoré : {e}")
+
+    @staticmethod
+    def key(url: str, params: dict) -> str:
+        return f"{url}?{urlencode(sorted(params.items()))}"
+
+    def validators(self, url: str, params: dict) -> dict:
+        entry = self.entries.get(self.key(url, params))
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def body(self, url: str, params: dict) -> dict:
+        return self.entries[self.key(url, params)]["body"]
+
+    def store(self, url: str, params: dict, headers, body: dict):
+        etag, modified = headers.get("ETag"), headers.get("Last-Modified")
+        if etag or modified:
+            self.entries[self.key(url, params)] = {"etag": etag or "", "last_modified": modified or "", "body": body}
+
+    def save(self, keep_ids=None):
+        """Écriture atomique ; keep_ids : ne garder que les films encore au programme."""
+        if keep_ids is not None:
+            self.entries = {k: v for k, v in self.entries.items()
+                            if (m := MOVIE_RE.search(k)) and m.group(1) in keep_ids}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def upcoming_films(items: list) -> dict:
+    """tmdb_id → première séance à venir (programme trié : le plus proche d'abord)."""
+    import excel_to_json as ex
+    films = {}
+    for obj in ex.drop_past(items, "date"):
+        tid = str(obj.get("tmdb_id") or "").strip()
+        if tid.isdigit() and tid not in films:
+            films[tid] = obj
+    return films
+
+
+def reasons(obj: dict, film, updated, max_age: timedelta, now: datetime) -> list:
+    """Motifs de rafraîchissement d'un film ; liste vide : fiche à jour.
+
+    Un champ manquant ne compte que si la fiche n'a pas été vue depuis max_age : maj du
+    catalogue récente = TMDB déjà interrogé, il n'a rien (pas de bande-annonce, ...)."""
+    out = []
+    stale = not updated or now - datetime.fromisoformat(updated) > max_age
+    if stale:
+        out += [k for k in WATCHED_FIELDS if not obj.get(k)]
+    if film is None:
+        out.append("hors_catalogue")
+    elif film.a_completer:
+        out.append("a_completer")
+    if updated and stale:
+        out.append("ancienne")
+    return out
+
+
+def fresh_film(old: Film, args) -> Film:
+    """Fiche TMDB par id ; les champs que la réponse laisse vides gardent l'ancienne valeur."""
+    import enrich
+    new = enrich.enrich_row(Screening(film=old), args).film
+    if new.backdrops in ("", "[]"):
+        new.backdrops = old.backdrops
+    return new
+
+
+def patch(obj: dict, film: Film) -> dict:
+    """Champs film d'une séance du programme, au format de programme.json."""
+    d = film_to_dict(film)
+    out = {k: d[k] for k in FILM_FIELDS if k in obj and k != "backdrops"}
+    if "backdrops" in obj:
+        try:
+            out["backdrops"] = json.loads(film.backdrops) if film.backdrops else []
+        except ValueError:
+            out["backdrops"] = obj["backdrops"]
+    return out
+
+
+def localized(patches: dict, films: dict, dry_run: bool = False) -> dict:
+    """URLs d'images TMDB → URLs locales (images.py) pour les séances déjà réécrites ;
+    ne garde que les films dont la séance change réellement."""
+    import images
+    copies = {}
+    for tid, (_titre, _why, fields) in patches.items():
+        copies[tid] = {k: v for k, v in films[tid].items() if k not in SOURCES_FIELDS}
+        copies[tid].update(fields)
+    local = [tid for tid in patches if images.is_local(films[tid])]
+    if local and not dry_run:
+        images.localize([copies[tid] for tid in local], images.base_url_in_use())
+    out = {}
+    for tid, (titre, why, fields) in patches.items():
+        keys = set(fields) | set(SOURCES_FIELDS)
+        if dry_run and tid in local:
+            keys -= set(IMAGE_FIELDS)    # images non téléchargées : comparaison sans elles
+        old, new = films[tid], copies[tid]
+        if any(old.get(k) != new.get(k) for k in keys):
+            out[tid] = (titre, why, {k: new[k] for k in keys if k in new})
+    return out
+
+
+def refresh(args, store: film_store.FilmStore = None) -> dict:
+    """Rafraîchit les films à venir incomplets ou anciens ; retourne les compteurs."""
+    import enrich
+    import excel_to_json as ex
+    from circuit import Budget
+
+    stats = {"films": 0, "a_jour": 0, "repris": 0, "modifies": 0, "erreurs": 0}
+    films = upcoming_films(ex.load_existing())
+    stats["films"] = len(films)
+    store = store or film_store.FilmStore.load()
+    cache = ConditionalCache(args.cache)
+    now, max_age = datetime.now(), timedelta(days=args.max_age)
+    budget = Budget(args.budget)
+    patches = {}
+
+    enrich.HTTP_CACHE = cache
+    try:
+        for tid, obj in films.items():
+            film = store.cat.film(tid)
+            why = reasons(obj, film, store.cat.updated(tid), max_age, now)
+            if not why:
+                stats["a_jour"] += 1
+                continue
+            if stats["repris"] >= args.limit or budget.expired():
+                continue
+            stats["repris"] += 1
+            for w in why:
+                metrics.count(f"refresh_{w}")
+            old = film or film_from_dict({**obj, "backdrops": json.dumps(obj.get("backdrops") or [], ensure_ascii=False)})
+            enrich.ROW_BUDGET = Budget(enrich.ROW_BUDGET_S)
+            try:
+                new = fresh_film(old, args)
+            except Exception as e:
+                print(f"[warn] {obj.get('titre') or tid} (tmdb {tid}) : {e}")
+                stats["erreurs"] += 1
+                continue
+            if not args.dry_run:
+                store.put_film(new)
+            patches[tid] = (new.titre, why, patch(obj, new))
+    finally:
+        enrich.HTTP_CACHE = None
+        enrich.ROW_BUDGET = Budget()
+    if stats["repris"] and not args.dry_run:
+        cache.save(keep_ids=films)
+
+    patches = localized(patches, films, args.dry_run)
+    for tid, (titre, why, fields) in patches.items():
+        stats["modifies"] += 1
+        print(f"[ok] {titre} (tmdb {tid}) : {', '.join(why)}")
+
+    if patches and not args.dry_run:
+        # relu juste avant l'écriture : un export entre-temps n'est pas écrasé
+        items = ex.load_existing()
+        for obj in items:
+            entry = patches.get(str(obj.get("tmdb_id") or "").strip())
+            if entry:
+                for k in SOURCES_FIELDS:
+                    obj.pop(k, None)
+                obj.update(entry[2])
+        ex.write_programme(items)
+    metrics.set_rows(rows_in=len(films), rows_out=stats["modifies"])
+    for k in ("repris", "modifies", "erreurs"):
+        metrics.count(f"refresh_{k}", stats[k])
+    return stats
+
+
+@metrics.instrumented("refresh")
+def run(args, store: film_store.FilmStore = None):
+    import excel_to_json as ex
+    if not ex.OUT_JSON.exists():
+        print(f"[info] {ex.OUT_JSON} absent : lancer export d'abord")
+        return
+    st = refresh(args, store)
+    print(f"[done] refresh : {st['films']} film(s) à venir, {st['a_jour']} à jour, {st['repris']} repris, "
+          f"{st['modifies']} modifié(s), {st['erreurs']} erreur(s)" + (" (--dry-run)" if args.dry_run else ""))
+
+
+def main(argv=None):
+    import enrich
+    p = argparse.ArgumentParser(description="Rafraîchit les fiches films des séances publiées")
+    p.add_argument("--max-age", dest="max_age", type=float, default=MAX_AGE_DAYS,
+                   help="jours au-delà desquels une fiche complète est reprise")
+    p.add_argument("--limit", type=int, default=LIMIT, help="films repris au plus par exécution")
+    p.add_argument("--budget", type=float, default=0, help="secondes au plus (0 : illimité)")
+    p.add_argument("--lang", dest="lang", default=enrich.LANG_DEFAULT)
+    p.add_argument("--cache", default=str(CACHE_PATH), help="réponses TMDB et validateurs (ETag)")
+    p.add_argument("--dry-run", dest="dry_run", action="store_true",
+                   help="interroger TMDB sans écrire programme.json ni le catalogue")
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", default="work/cassettes")
+    args, _ = p.parse_known_args(argv)
+    args.auto_margin = 4.0      # enrich_row : jamais utilisé sur le chemin id explicite
+
+    if args.http_mode != "live":
+        import http_replay
+        http_replay.install(enrich.get_session(), args.http_mode, Path(args.cassettes))
+    if args.http_mode == "replay":
+        enrich.TMDB_API_KEY = enrich.TMDB_API_KEY or "replay"
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
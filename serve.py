@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+serve.py — Service local de requêtes sur le programme exporté (stdlib uniquement).
+
+- Charge public/data/programme.json (écrit par excel_to_json.py) en mémoire,
+  avec des index par date, tmdb_id, catégorie et version
+- Rechargement à chaud : le fichier est re-vérifié (date / taille) au plus une fois
+  par seconde ; un fichier illisible (écriture en cours) laisse l'index précédent en place
+- ETag par (version du fichier, requête) + If-None-Match → 304 sans recalcul ni corps
+- Réponse gzip si le client l'accepte (Accept-Encoding)
+
+Endpoints (GET) :
+    /screenings?days=7                        séances des 7 prochains jours
+    /screenings?from=2025-03-01&to=2025-03-31 plage de dates (incluses)
+    /screenings?tmdb_id=603&version=VO        filtres combinables : tmdb_id, categorie,
+                                              version (préfixe : VO → VOstFR), q (titre)
+    /films/<tmdb_id>                          séances d'un film (mêmes filtres acceptés)
+    /dates                                    dates disponibles et nombre de séances
+    /programme.json                           fichier complet
+    /health
+
+Usage : python serve.py [--host 127.0.0.1] [--port 8765]
+        python -m pipeline serve
+"""
+
+import argparse, gzip, hashlib, json, threading, time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+PROGRAMME_JSON = Path("public/data/programme.json")
+HOST = "127.0.0.1"
+PORT = 8765
+RELOAD_CHECK = 1.0      # s entre deux vérifications du fichier
+GZIP_MIN_SIZE = 512     # en dessous, la compression ne vaut pas le coût
+CACHE_SIZE = 256        # réponses mémorisées par version du fichier
+
+FILTERS = ("from", "to", "days", "tmdb_id", "categorie", "version", "q")
+
+
+class ProgrammeIndex:
+    """Séances en mémoire + index ; positions dans self.items (ordre chronologique de l'export)."""
+
+    def __init__(self, items: list, version: str):
+        self.items = items
+        self.version = version
+        self.by_date = defaultdict(list)
+        self.by_tmdb = defaultdict(list)
+        self.by_categorie = defaultdict(list)
+        self.by_version = defaultdict(list)
+        for i, obj in enumerate(items):
+            self.by_date[(obj.get("date") or "").strip()].append(i)
+            self.by_tmdb[(obj.get("tmdb_id") or "").strip()].append(i)
+            self.by_categorie[(obj.get("categorie") or "").strip().lower()].append(i)
+            self.by_version[(obj.get("version") or "").strip().lower()].append(i)
+        self.dates = sorted(d for d in self.by_date if d)
+
+    def _date_range(self, date_from, date_to) -> list:
+        lo = bisect_left(self.dates, date_from) if date_from else 0
+        hi = bisect_right(self.dates, date_to) if date_to else len(self.dates)
+        return [i for d in self.dates[lo:hi] for i in self.by_date[d]]
+
+    def query(self, date_from=None, date_to=None, tmdb_id=None, categorie=None,
+              version=None, q=None) -> list:
+        candidates = []   # listes de positions, une par filtre indexé
+        if tmdb_id:
+            candidates.append(self.by_tmdb.get(tmdb_id, []))
+        if categorie:
+            candidates.append(self.by_categorie.get(categorie.lower(), []))
+        if version:
+            v = version.lower()
+            candidates.append([i for k, pos in self.by_version.items() if k.startswith(v) for i in pos])
+        if date_from or date_to:
+            candidates.append(self._date_range(date_from, date_to))
+
+        if candidates:
+            candidates.sort(key=len)
+            selected = set(candidates[0])
+            for pos in candidates[1:]:
+                selected.intersection_update(pos)
+            positions = sorted(selected)
+        else:
+            positions = range(len(self.items))
+
+        out = [self.items[i] for i in positions]
+        if q:
+            ql = q.lower()
+            out = [o for o in out
+                   if ql in (o.get("titre") or "").lower() or ql in (o.get("titre_original") or "").lower()]
+        return out
+
+    def date_counts(self) -> list:
+        return [{"date": d, "seances": len(self.by_date[d])} for d in self.dates]
+
+
+class ProgrammeStore:
+    """Index courant, rechargé quand programme.json change ; cache des réponses par version."""
+
+    def __init__(self, path: Path = PROGRAMME_JSON):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked = 0.0
+        self.index = ProgrammeIndex([], "vide")
+        self.raw = b"[]"
+        self._responses = {}
+        self.reload()
+
+    def _file_signature(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self):
+        sig = self._file_signature()
+        if sig is None or sig == self._signature:
+            return
+        try:
+            raw = self.path.read_bytes()
+            items = json.loads(raw.decode("utf-8"))
+            if not isinstance(items, list):
+                raise ValueError("liste attendue")
+        except (OSError, ValueError) as e:
+            print(f"[warn] {self.path} illisible ({e}) : index précédent conservé")
+            return
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        self.index = ProgrammeIndex(items, version)
+        self.raw = raw
+        self._responses = {}
+        self._signature = sig
+        print(f"[info] {self.path} chargé : {len(items)} séances (version {version})")
+
+    def current(self) -> ProgrammeIndex:
+        now = time.monotonic()
+        if now - self._checked >= RELOAD_CHECK:
+            with self._lock:
+                if now - self._checked >= RELOAD_CHECK:
+                    self._checked = now
+                    self.reload()
+        return self.index
+
+    def cached(self, key, build):
+        """Corps JSON (et sa version gzip) pour key, calculé une fois par version du fichier."""
+        resp = self._responses.get(key)
+        if resp is None:
+            body = build()
+            gz = gzip.compress(body, 6) if len(body) >= GZIP_MIN_SIZE else None
+            resp = (body, gz)
+            with self._lock:
+                if len(self._responses) >= CACHE_SIZE:
+                    self._responses.clear()
+                self._responses[key] = resp
+        return resp
+
+
+def parse_filters(query: dict) -> dict:
+    """Paramètres d'URL → arguments de ProgrammeIndex.query ; ValueError si invalides."""
+    get = lambda k: (query.get(k) or [""])[0].strip()
+    f = {"date_from": get("from") or None, "date_to": get("to") or None,
+         "tmdb_id": get("tmdb_id") or None, "categorie": get("categorie") or None,
+         "version": get("version") or None, "q": get("q") or None}
+    for k in ("date_from", "date_to"):
+        if f[k]:
+            date.fromisoformat(f[k])
+    if get("days"):
+        days = int(get("days"))
+        if days < 1:
+            raise ValueError("days doit être >= 1")
+        today = date.today()
+        f["date_from"] = f["date_from"] or today.isoformat()
+        f["date_to"] = (date.fromisoformat(f["date_from"]) + timedelta(days=days - 1)).isoformat()
+    return f
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "CineCarbonne/1.0"
+    store: ProgrammeStore = None
+    verbose = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+        index = self.store.current()
+
+        if path == "/health":
+            return self._send_json(200, {"ok": True, "version": index.version, "seances": len(index.items)})
+
+        try:
+            if path == "/screenings":
+                filters = parse_filters(query)
+                build = lambda: _dumps(index.query(**filters))
+            elif path.startswith("/films/"):
+                filters = parse_filters(query)
+                filters["tmdb_id"] = path[len("/films/"):]
+                build = lambda: _dumps(index.query(**filters))
+            elif path == "/dates":
+                filters = {}
+                build = lambda: _dumps(index.date_counts())
+            elif path == "/programme.json":
+                filters = {}
+                build = lambda: self.store.raw
+            else:
+                return self._send_json(404, {"erreur": f"chemin inconnu : {path}"})
+        except ValueError as e:
+            return self._send_json(400, {"erreur": f"paramètre invalide : {e}"})
+
+        # requête normalisée : même ETag pour les mêmes filtres, quel que soit leur ordre
+        key = (path, tuple(sorted((k, v) for k, v in filters.items() if v)))
+        etag = f'W/"{index.version}-{hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]}"'
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        body, gz = self.store.cached((index.version,) + key, build)
+        self._send_body(200, body, gz, etag)
+
+    def _send_json(self, status: int, data):
+        self._send_body(status, _dumps(data), None, None)
+
+    def _send_body(self, status: int, body: bytes, gz, etag):
+        use_gzip = gz is not None and "gzip" in self.headers.get("Accept-Encoding", "")
+        payload = gz if use_gzip else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        if self.verbose:
+            super().log_message(fmt, *args)
+
+
+def make_server(host: str = HOST, port: int = PORT, path: Path = PROGRAMME_JSON, verbose: bool = False):
+    handler = type("ProgrammeHandler", (Handler,), {"store": ProgrammeStore(path), "verbose": verbose})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Service local de requêtes sur programme.json")
+    p.add_argument("--host", default=HOST)
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--file", default=str(PROGRAMME_JSON))
+    p.add_argument("--verbose", action="store_true", help="journal des requêtes")
+    args, _ = p.parse_known_args(argv)
+
+    httpd = make_server(args.host, args.port, Path(args.file), args.verbose)
+    print(f"[info] service sur http://{args.host}:{args.port}/screenings?days=7 (Ctrl+C pour arrêter)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[stop] service arrêté.")
+    finally:
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
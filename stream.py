@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+stream.py — Pipeline en flux : normalize → enrich → export sans barrière entre les étapes.
+
+- Producteur (thread) : parcourt la feuille source (normalize.iter_screenings) et dépose
+  chaque séance dans la file bornée d'un worker ; file pleine → il attend (contre-pression)
+- Workers d'enrichissement (--workers) : les séances d'un même film vont toujours au même
+  worker (routage par titre nettoyé / id) : un film n'est recherché qu'une fois, les séances
+  suivantes sont servies par le magasin de films (film_store.py)
+- Un seul choix interactif à la fois (enrich.PROMPT_LOCK) ; les autres workers continuent
+- Consommateur (thread principal) : convertit chaque séance enrichie en objet programme
+  dès qu'elle arrive, puis écrit normalized.xlsx, enriched.xlsx (xlsx_io, en flux),
+  le catalogue, programme.json (+ vues) et les manifestes des trois étapes
+  (un "all" suivant n'a rien à relancer) ; --no-xlsx : catalogue et programme seulement
+- Durée totale ≈ celle de l'étape la plus lente (en pratique : les appels TMDB),
+  au lieu de la somme des étapes ; le résumé affiche le temps occupé de chaque étape
+- Différences avec les étapes séparées : pas de journal de reprise (--resume),
+  budget par ligne non appliqué (budget d'exécution et disjoncteurs conservés)
+
+Usage : python stream.py [--workers 4] [--queue-size 64] [--lang fr-FR] [--http replay] [--force] [--no-xlsx]
+        python -m pipeline all --stream [--images] [--prewarm]
+"""
+
+import argparse, queue, threading, time, zlib
+from pathlib import Path
+
+import film_store
+import manifest
+import metrics
+import normalize
+import titles
+import xlsx_io
+
+WORKERS = 4
+QUEUE_SIZE = 64
+_END = object()
+
+
+def route_key(rec: dict) -> str:
+    """Clé de routage : même film → même worker."""
+    if rec.get("TmdbId"):
+        return f"tmdb:{rec['TmdbId']}"
+    if rec.get("ImdbId"):
+        return f"imdb:{rec['ImdbId']}"
+    title, _event, year, _version = titles.clean_title(rec.get("Titre") or "")
+    return film_store.key_of(title, year)
+
+
+def output_columns() -> list:
+    """Colonnes de enriched.xlsx, identiques à celles d'une étape enrich classique."""
+    import pandas as pd
+    import enrich
+    df = pd.DataFrame(columns=normalize.NORMALIZED_COLS)
+    return list(enrich.ensure_output_cols(enrich.normalize_columns(df)).columns)
+
+
+_busy_lock = threading.Lock()
+
+def _busy(totals: dict, name: str, t0: float):
+    """Temps occupé par étape (cumulé sur les workers)."""
+    dt = time.perf_counter() - t0
+    with _busy_lock:
+        totals[name] = totals.get(name, 0.0) + dt
+
+
+def stream(args) -> dict:
+    """Exécute le flux ; retourne {"rows", "items", "errors", "busy"}."""
+    import pandas as pd
+    import enrich
+    import excel_to_json as ex
+    from circuit import Budget
+    from model import Table
+
+    table = Table(output_columns())
+    store = film_store.FilmStore.load()
+    busy = {}
+    meta = {}
+    failure = []
+    inboxes = [queue.Queue(maxsize=args.queue_size) for _ in range(args.workers)]
+    outbox = queue.Queue(maxsize=args.queue_size)
+    records = []
+
+    def produce():
+        try:
+            it = normalize.iter_screenings(meta=meta)
+            while True:
+                t0 = time.perf_counter()
+                rec = next(it, _END)
+                _busy(busy, "normalize", t0)
+                if rec is _END:
+                    break
+                records.append(rec)
+                inbox = inboxes[zlib.crc32(route_key(rec).encode("utf-8")) % len(inboxes)]
+                inbox.put((len(records) - 1, rec))      # bloque si le worker est en retard
+        except Exception as e:
+            failure.append(e)
+        finally:
+            for inbox in inboxes:
+                inbox.put(_END)
+
+    def work(inbox):
+        try:
+            while True:
+                item = inbox.get()
+                if item is _END:
+                    return
+                i, rec = item
+                t0 = time.perf_counter()
+                row = {c: "" for c in table.columns}
+                s, error = None, False
+                # toute erreur d'une ligne (règles de titres, enrich, ...) → ligne en erreur, worker intact
+                try:
+                    row.update({k: "" if v is None else str(v) for k, v in rec.items()})
+                    for o, n in enrich.COLUMN_ALIASES.items():
+                        if o in row and n in row and not row[n]:
+                            row[n] = row[o]
+                    s = table.screening_from_dict(row)
+                    titles.annotate([s])
+                    s = enrich.enrich_cached(s, args, store, force_prompt=enrich.needs_manual_pick(s))
+                except Exception as e:
+                    print(f"[warn] Ligne {i} ({row.get('Titre') or row.get('titre') or ''}) : {e}")
+                    metrics.count("row_errors")
+                    error = True
+                if s is not None:
+                    row = {k: "" if v is None else str(v) for k, v in table.as_dict(s).items()}
+                _busy(busy, "enrich", t0)
+                outbox.put((i, row, error))
+        finally:
+            outbox.put(_END)        # même si le worker meurt : le consommateur n'attend pas indéfiniment
+
+    enrich.RUN_BUDGET = Budget(args.run_budget)
+    for breaker in enrich.BREAKERS.values():
+        breaker.reset()
+    threads = [threading.Thread(target=produce, name="stream-normalize", daemon=True)]
+    threads += [threading.Thread(target=work, args=(q,), name=f"stream-enrich-{k}", daemon=True)
+                for k, q in enumerate(inboxes)]
+    for t in threads:
+        t.start()
+
+    rows, objs, errors = {}, {}, 0
+    finished = 0
+    while finished < len(inboxes):
+        item = outbox.get()
+        if item is _END:
+            finished += 1
+            continue
+        t0 = time.perf_counter()
+        i, row, error = item
+        rows[i] = row
+        errors += error
+        if ex.is_exported(row):
+            objs[i] = ex.row_to_obj(pd.Series(row))
+        _busy(busy, "export", t0)
+    for t in threads:
+        t.join()
+    enrich.RUN_BUDGET = Budget()
+    if failure:
+        raise failure[0]
+
+    t0 = time.perf_counter()
+    upcoming = meta.get("prochainement", [])
+    normalize.write_outputs(records, upcoming, xlsx=not args.no_xlsx)
+    out = [rows[i] for i in range(len(rows))]
+    if not args.no_xlsx:
+        xlsx_io.write_dicts(ex.IN_XLSX, table.columns, out)
+    store.cat.replace_screenings(out)
+    _busy(busy, "ecriture", t0)
+
+    t0 = time.perf_counter()
+    items = ex.merge_programme([objs[i] for i in sorted(objs)])
+    ex.write_programme(items)
+    _busy(busy, "export", t0)
+    metrics.set_rows(rows_in=meta.get("lignes"), rows_out=len(items))
+    return {"rows": len(out), "items": len(items), "errors": errors, "busy": busy}
+
+
+def stage_manifests(args) -> list:
+    return [manifest.for_stage("normalize", {"sheet": normalize.SHEET_NAME}),
+            manifest.for_stage("enrich", {"lang": args.lang, "auto_margin": args.auto_margin, "http": args.http_mode,
+                                          "xlsx": True}),
+            manifest.for_stage("export", {})]
+
+
+@metrics.instrumented("stream")
+def main(argv=None):
+    import enrich
+    p = argparse.ArgumentParser(description="Pipeline en flux normalize → enrich → export")
+    p.add_argument("--workers", type=int, default=WORKERS, help="workers d'enrichissement")
+    p.add_argument("--queue-size", dest="queue_size", type=int, default=QUEUE_SIZE,
+                   help="taille des files entre étapes (contre-pression)")
+    p.add_argument("--lang", dest="lang", default=enrich.LANG_DEFAULT)
+    p.add_argument("--auto-margin", dest="auto_margin", type=float, default=4.0)
+    p.add_argument("--run-budget", dest="run_budget", type=float, default=0,
+                   help="secondes avant mode dégradé (0 : illimité)")
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", default="work/cassettes")
+    p.add_argument("--force", action="store_true", help="relancer même si les entrées n'ont pas changé")
+    p.add_argument("--no-xlsx", dest="no_xlsx", action="store_true",
+                   help="ni normalized.xlsx ni enriched.xlsx (séances dans le catalogue seulement)")
+    args, _ = p.parse_known_args(argv)
+    args.workers = max(1, args.workers)
+    args.queue_size = max(1, args.queue_size)
+
+    if not normalize.INPUT_PATH.exists():
+        raise SystemExit(f"❌ Fichier introuvable : {normalize.INPUT_PATH}")
+    if not args.force and not args.no_xlsx and all(m.is_fresh() for m in stage_manifests(args)):
+        print("[skip] normalize, enrich, export : entrées inchangées (--force pour relancer)")
+        metrics.count("skipped")
+        return
+
+    if args.http_mode != "live":
+        import http_replay
+        http_replay.install(enrich.get_session(), args.http_mode, Path(args.cassettes))
+        if args.http_mode == "replay":
+            enrich.TMDB_API_KEY = enrich.TMDB_API_KEY or "replay"
+
+    t0 = time.perf_counter()
+    res = stream(args)
+    wall = time.perf_counter() - t0
+    if not res["errors"] and not args.no_xlsx:     # sans classeurs, les manifestes ne décrivent rien
+        for m in stage_manifests(args):
+            m.save()
+    busy = "  ".join(f"{k} {v:.2f} s" for k, v in res["busy"].items())
+    print(f"[done] flux : {res['rows']} séance(s) enrichie(s), {res['items']} publiée(s) en {wall:.2f} s "
+          f"(occupation : {busy})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+titles.py — Nettoyage des titres source (colonne E) avant la recherche TMDB.
+
+- Retire le bruit événementiel : "Avant-première", "Ciné-club", "+ débat", "(1982)", "VOSTFR", ...
+- Extrait des champs structurés par séance :
+    evenement       "Avant-première, Débat"
+    annee_indice    année entre parenthèses → filtre TMDB primary_release_year
+    titre_recherche titre nettoyé, utilisé pour la recherche et le score de similarité
+- Règles par défaut ci-dessous, complétées par input/title_rules.json (optionnel) :
+    [{"pattern": "ciné[- ]?philo", "evenement": "Ciné-philo"},
+     {"pattern": "\\\\s*-\\\\s*copie restaurée 4k", "evenement": ""}]
+  (pattern : expression régulière, insensible à la casse ; evenement vide = simple suppression)
+- Le titre affiché n'est pas modifié : seul le titre de recherche est nettoyé
+
+Usage : python titles.py [--in work/normalized.xlsx]            aperçu des titres modifiés
+        python titles.py --search [--http replay]                taux d'auto-sélection brut / nettoyé
+"""
+
+import argparse, json, re
+from functools import lru_cache
+from pathlib import Path
+
+RULES_PATH = Path("input/title_rules.json")
+
+YEAR_RE = re.compile(r"[\(\[]\s*((?:18|19|20)\d{2})\s*[\)\]]")
+VERSION_RE = re.compile(r"[\(\[]\s*(vostfr|vosta|vost|vo|vf|3d)\s*[\)\]]|[\s\-–]+(vostfr|vost|3d)\s*$", re.I)
+
+
+def _edge(p: str) -> str:
+    """Mention d'évènement en tête du titre, après un séparateur explicite (" - ", ":", "+",
+    "|", ",", "/", parenthèse ouvrante) ou en fin de titre : jamais au milieu d'un vrai titre
+    ("Le Ciné-club de minuit", "Une séance spéciale")."""
+    return rf"(?:(?:^|\s*[\-–:+|,/]\s*|(?<=[\(\[])\s*)(?:{p})\b|\s+(?:{p})\s*$)"
+
+
+# (motif, libellé d'évènement) ; un libellé None reprend le texte capturé (groupe 1)
+DEFAULT_RULES = [
+    (_edge(r"avant[\s\-]?premi[eè]re"), "Avant-première"),
+    (_edge(r"cin[ée][\s\-]?club"), "Ciné-club"),
+    (_edge(r"cin[ée][\s\-]?go[uû]ter"), "Ciné-goûter"),
+    (_edge(r"cin[ée][\s\-]?d[ée]bat"), "Ciné-débat"),
+    (_edge(r"cin[ée][\s\-]?rencontre"), "Ciné-rencontre"),
+    (_edge(r"s[ée]ance\s+sp[ée]ciale"), "Séance spéciale"),
+    (_edge(r"sortie\s+nationale"), "Sortie nationale"),
+    (_edge(r"version\s+restaur[ée]e"), "Version restaurée"),
+    (r"\+\s*(d[ée]bat|rencontre|discussion|animation|concert|atelier|quiz|pot|ap[ée]ro)\b.*$", None),
+    # "La Présence de l'absence" : seulement après un séparateur, ou sous la forme "en présence de"
+    (r"(?:\s*[\-–:+(|]\s*(?:en\s+)?|\s+en\s+|^en\s+)pr[ée]sence\s+d(?:e|u|es)\b.*$", "Rencontre"),
+]
+
+SEPARATORS = " \t-–—:|/+,."
+# reste trop court pour être un titre : une règle a mangé le titre lui-même
+ARTICLES = {"le", "la", "les", "l'", "un", "une", "des", "du", "de", "the", "a", "an"}
+
+
+def load_rules(path: Path = RULES_PATH) -> tuple:
+    rules = list(DEFAULT_RULES)
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rules += [(r["pattern"], r.get("evenement", "")) for r in json.load(f)]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"[warn] {path} ignoré : {e}")
+    compiled = []
+    for p, label in rules:
+        try:
+            compiled.append((re.compile(p, re.I), label))
+        except (re.error, TypeError) as e:
+            print(f"[warn] {path} : règle {p!r} ignorée : {e}")
+    return tuple(compiled)
+
+
+def rules_files(root: Path = Path(".")) -> list:
+    """Fichiers de configuration pris en compte (entrées du manifeste enrich)."""
+    path = Path(root) / RULES_PATH
+    return [path] if path.exists() else []
+
+
+_RULES = {}
+
+def rules(path: Path = RULES_PATH) -> tuple:
+    if path not in _RULES:
+        _RULES[path] = load_rules(path)
+    return _RULES[path]
+
+
+@lru_cache(maxsize=4096)
+def clean_title(raw: str, rules_path: Path = RULES_PATH) -> tuple:
+    """Titre source → (titre de recherche, évènement, année indicative, version indicative)."""
+    text = raw or ""
+    events = []
+    year = ""
+    m = YEAR_RE.search(text)
+    if m:
+        year = m.group(1)
+        text = text[:m.start()] + " " + text[m.end():]
+    version = ""
+    m = VERSION_RE.search(text)
+    if m:
+        version = (m.group(1) or m.group(2)).upper()
+        text = text[:m.start()] + " " + text[m.end():]
+    base = text
+    for rx, label in rules(rules_path):
+        m = rx.search(text)
+        if not m:
+            continue
+        if label is None:
+            label = m.group(1).capitalize()
+        if label and label not in events:
+            events.append(label)
+        text = text[:m.start()] + " " + text[m.end():]
+    text = re.sub(r"[\(\[]\s*[\)\]]", " ", text)
+    text = " ".join(text.split()).strip(SEPARATORS)
+    if text.lower() in ARTICLES:
+        # une règle a emporté le titre lui-même ("La Présence de ...") : ni nettoyage
+        # ni évènement au-delà de l'année et de la version
+        text = " ".join(base.split()).strip(SEPARATORS)
+        events = []
+    if not text:
+        text = (raw or "").strip()   # le titre n'était que du "bruit" : on garde l'original
+    return text, ", ".join(events), year, version
+
+
+def annotate(screenings, rules_path: Path = RULES_PATH) -> int:
+    """Renseigne titre_recherche / evenement / annee_indice ; retourne le nombre de titres modifiés."""
+    changed = 0
+    for s in screenings:
+        raw = (s.film.titre or "").strip()
+        if not raw or s.titre_recherche:
+            continue
+        clean, event, year, _version = clean_title(raw, rules_path)
+        s.titre_recherche = clean
+        s.evenement = s.evenement or event
+        s.annee_indice = s.annee_indice or year
+        if clean != raw:
+            changed += 1
+    return changed
+
+
+def autopick_report(raw_titles, lang: str, auto_margin: float) -> dict:
+    """Recherche chaque titre distinct brut puis nettoyé : auto-sélections et recherches vides."""
+    import enrich
+    stats = {"titres": 0, "modifies": 0,
+             "brut": {"autopick": 0, "vide": 0}, "nettoye": {"autopick": 0, "vide": 0}}
+    for raw in sorted(set(raw_titles)):
+        clean, _event, year, _version = clean_title(raw)
+        stats["titres"] += 1
+        stats["modifies"] += clean != raw
+        for kind, query, y in (("brut", raw, None), ("nettoye", clean, year or None)):
+            cands = enrich.search_movie(query, lang, year=y)
+            if not cands:
+                stats[kind]["vide"] += 1
+            elif enrich.autopick(enrich.rank_candidates(cands, query), query, auto_margin):
+                stats[kind]["autopick"] += 1
+    return stats
+
+
+def main(argv=None):
+    import pandas as pd
+    p = argparse.ArgumentParser(description="Nettoyage des titres avant la recherche TMDB")
+    p.add_argument("--in", dest="in_xlsx", default="work/normalized.xlsx")
+    p.add_argument("--search", action="store_true", help="mesurer le taux d'auto-sélection (appels TMDB)")
+    p.add_argument("--lang", default="fr-FR")
+    p.add_argument("--auto-margin", dest="auto_margin", type=float, default=4.0)
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", default="work/cassettes")
+    args = p.parse_args(argv)
+
+    df = pd.read_excel(args.in_xlsx, dtype=str).fillna("")
+    raw_titles = [t.strip() for t in df.get("Titre", []) if t.strip()]
+    for raw in sorted(set(raw_titles)):
+        clean, event, year, version = clean_title(raw)
+        if clean != raw:
+            extra = "  ".join(x for x in (event and f"[{event}]", year and f"année={year}",
+                                          version and f"version={version}") if x)
+            print(f"  {raw!r} → {clean!r}  {extra}")
+
+    if args.search:
+        import enrich
+        if args.http_mode != "live":
+            import http_replay
+            http_replay.install(enrich.get_session(), args.http_mode, Path(args.cassettes))
+        if args.http_mode == "replay":
+            enrich.TMDB_API_KEY = enrich.TMDB_API_KEY or "replay"
+        st = autopick_report(raw_titles, args.lang, args.auto_margin)
+        n = st["titres"] or 1
+        print(f"=== {st['titres']} titre(s) distinct(s), {st['modifies']} nettoyé(s) ===")
+        for kind, label in (("brut", "titres bruts   "), ("nettoye", "titres nettoyés")):
+            print(f"  {label} : auto-sélection {st[kind]['autopick']}/{st['titres']} "
+                  f"({100 * st[kind]['autopick'] / n:.0f} %), sans résultat {st[kind]['vide']}")
+
+
+if __name__ == "__main__":
+    main()
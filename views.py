@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+views.py — Vues précalculées du programme, écrites à côté de programme.json.
+
+public/data/views/
+    today.json              séances du jour
+    weeks/<AAAA>-W<ss>.json séances d'une semaine ISO
+    films/<id>.json         fiche film + toutes ses séances (id = tmdb_id, sinon titre "slugifié")
+    index.json              liste des vues avec empreinte (sha256, 16 car.) et nombre de séances
+
+- Générées dans la même passe que programme.json (excel_to_json, watch) et après images
+- JSON compact ; un fichier dont le contenu n'a pas changé n'est pas réécrit
+  (dates de modification / cache HTTP stables), les vues disparues sont supprimées
+- stdlib uniquement
+"""
+
+import hashlib, json, os, re, unicodedata
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+
+VIEWS_DIR = Path("public/data/views")
+
+# champs propres à une séance ; les autres décrivent le film
+SCREENING_FIELDS = ("datetime_local", "date", "heure", "version", "tarif", "prix", "categorie", "commentaire",
+                    "evenement")
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def slugify(text: str) -> str:
+    s = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    s = re.sub(r"[^a-z0-9]+", "-", s.lower()).strip("-")
+    return s or "sans-titre"
+
+
+def film_id(obj: dict) -> str:
+    tid = (obj.get("tmdb_id") or "").strip()
+    return tid if tid else "t-" + slugify(obj.get("titre") or "")
+
+
+def iso_week(d: str):
+    try:
+        y, w, _ = date.fromisoformat(d).isocalendar()
+    except (TypeError, ValueError):
+        return None
+    return f"{y}-W{w:02d}"
+
+
+def build_views(items: list, today: date = None) -> dict:
+    """{chemin relatif: données} pour toutes les vues (hors index)."""
+    today = (today or date.today()).isoformat()
+    views = {"today.json": [o for o in items if o.get("date") == today]}
+
+    weeks = defaultdict(list)
+    films = {}
+    for obj in items:
+        wk = iso_week(obj.get("date") or "")
+        if wk:
+            weeks[wk].append(obj)
+        fid = film_id(obj)
+        film = films.get(fid)
+        if film is None:
+            film = {k: v for k, v in obj.items() if k not in SCREENING_FIELDS}
+            film["id"] = fid
+            film["seances"] = []
+            films[fid] = film
+        film["seances"].append({k: obj.get(k, "") for k in SCREENING_FIELDS})
+
+    for wk, lst in weeks.items():
+        views[f"weeks/{wk}.json"] = lst
+    for fid, film in films.items():
+        views[f"films/{fid}.json"] = film
+    return views
+
+
+def _count(data) -> int:
+    return len(data["seances"]) if isinstance(data, dict) else len(data)
+
+
+def write_views(items: list, views_dir: Path = VIEWS_DIR, today: date = None) -> dict:
+    """Écrit les vues + index.json ; retourne l'index."""
+    views_dir = Path(views_dir)
+    index = {"generated": datetime.now().isoformat(timespec="seconds"),
+             "today": None, "weeks": [], "films": []}
+    written = 0
+    for rel, data in sorted(build_views(items, today).items()):
+        body = _dumps(data)
+        path = views_dir / rel
+        digest = _digest(body)
+        if not (path.exists() and _digest(path.read_bytes()) == digest):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+            written += 1
+        entry = {"path": rel, "hash": digest, "seances": _count(data)}
+        if rel == "today.json":
+            index["today"] = entry
+        elif rel.startswith("weeks/"):
+            index["weeks"].append({"week": Path(rel).stem, **entry})
+        else:
+            index["films"].append({"id": data["id"], "titre": data.get("titre", ""), **entry})
+
+    # vues disparues (semaine passée, film retiré du programme)
+    keep = {views_dir / e["path"] for e in index["weeks"] + index["films"]}
+    for sub in ("weeks", "films"):
+        for path in (views_dir / sub).glob("*.json"):
+            if path not in keep:
+                path.unlink()
+
+    body = json.dumps(index, ensure_ascii=False, indent=2).encode("utf-8")
+    tmp = views_dir / "index.tmp"
+    views_dir.mkdir(parents=True, exist_ok=True)
+    tmp.write_bytes(body)
+    os.replace(tmp, views_dir / "index.json")
+    print(f"✅ Écrit : {views_dir} ({len(index['weeks'])} semaine(s), {len(index['films'])} film(s), "
+          f"{written} fichier(s) mis à jour)")
+    return index
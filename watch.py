@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+watch.py — Mode surveillance : met à jour programme.json dès que input/source.xlsx change.
+
+- Sonde la date de modification / taille du classeur (stdlib, aucune dépendance)
+- Normalise Feuil1 en mémoire et calcule une empreinte par séance
+- Diff avec l'état précédent (work/watch_state.json) : séances ajoutées / modifiées / supprimées
+- N'enrichit que les séances ajoutées ; un film déjà connu (même titre source) est repris
+  du cache de l'état, sans appel TMDB ni choix interactif
+- Film absent du cache de l'état : magasin de films (film_store.py) avant TMDB
+- Met à jour programme.json (suppressions + ajouts), normalized.xlsx et enriched.xlsx
+- Blocs "prochainement" modifiés : films annoncés résolus en tâche de fond (prewarm.py)
+- Premier lancement : le cache des films est amorcé depuis work/enriched.xlsx
+- Séance dont l'enrichissement échoue : publiée sans fiche, hors de l'état, réessayée au
+  passage suivant
+- Les manifestes des étapes sont mis à jour (sauf échec d'une séance) : un "convert" suivant
+  n'a rien à relancer
+
+Usage : python watch.py [--interval 1.0] [--once] [--lang fr-FR] [--auto-margin 4] [--http replay]
+        python -m pipeline watch
+"""
+
+import argparse, hashlib, json, os, time
+from collections import Counter
+from pathlib import Path
+
+import film_store
+import manifest
+import metrics
+import normalize
+import titles
+import xlsx_io
+from model import FILM_FIELDS, Table, film_from_dict, film_to_dict
+
+STATE_PATH    = Path("work/watch_state.json")
+ENRICHED_PATH = Path("work/enriched.xlsx")
+POLL_INTERVAL = 1.0
+DEBOUNCE      = 0.3    # laisse Excel finir d'écrire le fichier
+
+
+def title_key(title) -> str:
+    return " ".join(str(title or "").lower().split())
+
+
+def film_key(s) -> str:
+    """Clé du cache films : id explicite du classeur, sinon titre source."""
+    if (s.film.tmdb_id or "").strip():
+        return f"tmdb:{s.film.tmdb_id.strip()}"
+    if (s.film.imdb_id or "").strip():
+        return f"imdb:{s.film.imdb_id.strip()}"
+    return title_key(s.film.titre)
+
+
+def screening_hashes(records: list) -> list:
+    """Empreinte par séance ; les doublons exacts reçoivent un suffixe #n."""
+    seen = Counter()
+    out = []
+    for rec in records:
+        h = hashlib.sha1(json.dumps(rec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        seen[h] += 1
+        out.append(h if seen[h] == 1 else f"{h}#{seen[h]}")
+    return out
+
+
+def load_state() -> dict:
+    if STATE_PATH.exists():
+        try:
+            with open(STATE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            print(f"[warn] {STATE_PATH} illisible : état réinitialisé")
+    return {"screenings": {}, "upcoming": None, "films": bootstrap_films()}
+
+
+def save_state(state: dict):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, STATE_PATH)
+
+
+def bootstrap_films() -> dict:
+    """Cache titre source → champs film, depuis un enriched.xlsx existant."""
+    import pandas as pd
+    films = {}
+    if ENRICHED_PATH.exists():
+        df = pd.read_excel(ENRICHED_PATH, dtype=str).fillna("")
+        if "Titre" in df.columns and "tmdb_id" in df.columns:
+            for _, r in df[df["tmdb_id"] != ""].iterrows():
+                film = {f: r.get(f, "") for f in FILM_FIELDS}
+                if r.get("TmdbId", ""):
+                    films[f"tmdb:{r['TmdbId']}"] = film
+                elif r.get("ImdbId", ""):
+                    films[f"imdb:{r['ImdbId']}"] = film
+                else:
+                    films[title_key(r["Titre"])] = film
+    if films:
+        print(f"[info] cache films amorcé depuis {ENRICHED_PATH} : {len(films)} film(s)")
+    return films
+
+
+def enrich_added(records: list, films: dict, args, store) -> list:
+    """(ligne enrichie, échec) pour chaque séance ajoutée (cache films d'abord, TMDB sinon)."""
+    import pandas as pd
+    import enrich
+    df = pd.DataFrame(records, columns=normalize.NORMALIZED_COLS).fillna("")
+    df = enrich.ensure_output_cols(enrich.normalize_columns(df))
+    table, screenings = Table.from_frame(df)
+    titles.annotate(screenings)
+    rows = []
+    for s in screenings:
+        key = film_key(s)
+        film = films.get(key)
+        metrics.cache("films", film is not None)
+        failed = False
+        if film is None:
+            try:
+                s = enrich.enrich_cached(s, args, store, force_prompt=enrich.needs_manual_pick(s))
+                films[key] = film_to_dict(s.film)
+            except Exception as e:
+                print(f"[warn] {s.film.titre}: {e}")
+                metrics.count("row_errors")
+                failed = True
+        else:
+            s.film = film_from_dict(film)
+        rows.append(({k: "" if v is None else str(v) for k, v in table.as_dict(s).items()}, failed))
+    return rows
+
+
+def update_programme(removed_rows: list, added_rows: list, current_rows: list):
+    import pandas as pd
+    import excel_to_json as ex
+
+    def obj_of(row):
+        return ex.row_to_obj(pd.Series(row))
+
+    current_keys = {ex.make_key(obj_of(r)) for r in current_rows if ex.is_exported(r)}
+    merged = {ex.make_key(x): x for x in ex.archive_past(ex.load_existing(), mode="date")}
+    for r in removed_rows:
+        k = ex.make_key(obj_of(r))
+        if k not in current_keys:
+            merged.pop(k, None)
+    for r in added_rows:
+        if ex.is_exported(r):
+            obj = obj_of(r)
+            merged[ex.make_key(obj)] = obj
+    items = ex.sort_items(list(merged.values()))
+    ex.write_programme(items)
+    return len(items)
+
+
+def cycle(state: dict, args, store) -> dict:
+    """Un passage : diff de la feuille source et propagation des séances touchées."""
+    t0 = time.perf_counter()
+    with metrics.stage("watch"):
+        records, upcoming, n_raw = normalize.read_screenings()
+        metrics.set_rows(rows_in=n_raw, rows_out=len(records))
+        hashes = screening_hashes(records)
+        old = state["screenings"]
+        current = set(hashes)
+
+        added = [(h, r) for h, r in zip(hashes, records) if h not in old]
+        removed = [h for h in old if h not in current]
+        removed_ids = {(old[h].get("Titre"), old[h].get("Date")) for h in removed}
+        changed = sum(1 for _, r in added if (r.get("Titre"), r.get("Date")) in removed_ids)
+        if not added and not removed and upcoming == state.get("upcoming"):
+            return {"added": 0, "changed": 0, "removed": 0, "seconds": time.perf_counter() - t0}
+
+        if upcoming != state.get("upcoming"):
+            import prewarm
+            prewarm.start_background(upcoming, args)
+        films_before = len(state["films"])
+        enriched = enrich_added([r for _, r in added], state["films"], args, store)
+        added_rows = [row for row, _ in enriched]
+        removed_rows = [old.pop(h) for h in removed]
+        # séance en échec : publiée sans fiche, mais hors de l'état → de nouveau "ajoutée"
+        # (et réessayée) au passage suivant
+        failed = {}
+        for (h, _), (row, error) in zip(added, enriched):
+            if error:
+                failed[h] = row
+            else:
+                old[h] = row
+        current_rows = [old.get(h) or failed[h] for h in hashes]
+        state["upcoming"] = upcoming
+
+        n_items = update_programme(removed_rows, added_rows, current_rows)
+        normalize.write_outputs(records, upcoming)
+        xlsx_io.write_dicts(ENRICHED_PATH, list(current_rows[0]) if current_rows else [], current_rows)
+        store.cat.replace_screenings(current_rows)
+        save_state(state)
+        if not failed:      # sinon enrich / export resteraient "à jour" avec des lignes sans fiche
+            for stage, params in (("normalize", {"sheet": normalize.SHEET_NAME}),
+                                  ("enrich", {"lang": args.lang, "auto_margin": args.auto_margin,
+                                              "http": args.http_mode, "xlsx": True}),
+                                  ("export", {})):
+                manifest.for_stage(stage, params).save()
+        metrics.count("added", len(added) - changed)
+        metrics.count("changed", changed)
+        metrics.count("removed", len(removed) - changed)
+    metrics.save(quiet=True)
+    return {"added": len(added) - changed, "changed": changed, "removed": len(removed) - changed,
+            "resolved": len(state["films"]) - films_before, "items": n_items, "failed": len(failed),
+            "seconds": time.perf_counter() - t0}
+
+
+def file_signature(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def main(argv=None):
+    import enrich
+    p = argparse.ArgumentParser(description="Surveillance de input/source.xlsx")
+    p.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    p.add_argument("--once", action="store_true", help="un seul passage puis sortie")
+    p.add_argument("--lang", dest="lang", default=enrich.LANG_DEFAULT)
+    p.add_argument("--auto-margin", dest="auto_margin", type=float, default=4.0)
+    p.add_argument("--http", dest="http_mode", choices=("live", "record", "replay"), default="live")
+    p.add_argument("--cassettes", default="work/cassettes")
+    args, _ = p.parse_known_args(argv)
+
+    if args.http_mode != "live":
+        import http_replay
+        http_replay.install(enrich.get_session(), args.http_mode, Path(args.cassettes))
+        if args.http_mode == "replay":
+            enrich.TMDB_API_KEY = enrich.TMDB_API_KEY or "replay"
+    state = load_state()
+    store = film_store.FilmStore.load()
+    last = None
+    print(f"[info] surveillance de {normalize.INPUT_PATH} (Ctrl+C pour arrêter)")
+    try:
+        while True:
+            sig = file_signature(normalize.INPUT_PATH)
+            if sig is not None and sig != last:
+                time.sleep(DEBOUNCE)
+                if file_signature(normalize.INPUT_PATH) == sig:
+                    try:
+                        res = cycle(state, args, store)
+                        last = None if res.get("failed") else sig     # échecs : nouveau passage
+                        if res["added"] or res["changed"] or res["removed"]:
+                            print(f"[watch] +{res['added']} ~{res['changed']} -{res['removed']} séance(s), "
+                                  f"{res['resolved']} film(s) résolu(s) via TMDB, "
+                                  f"{res['items']} séances publiées  ({res['seconds']:.2f} s)"
+                                  + (f", {res['failed']} en échec (réessai)" if res.get("failed") else ""))
+                        else:
+                            print(f"[watch] aucun changement de séance ({res['seconds']:.2f} s)")
+                    except (PermissionError, OSError, ValueError) as e:
+                        # fichier encore verrouillé / en cours d'écriture : on réessaiera
+                        print(f"[warn] lecture impossible pour l'instant : {e}")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n[stop] surveillance arrêtée.")
+
+
+if __name__ == "__main__":
+    main()
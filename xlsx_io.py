@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+xlsx_io.py — Écriture en flux des classeurs de travail (normalized.xlsx, enriched.xlsx).
+
+- Une feuille, une ligne d'en-tête puis les lignes, écrites au fil de l'eau :
+  xlsxwriter (constant_memory) s'il est installé, sinon openpyxl en mode écriture seule ;
+  ni DataFrame ni classeur complet en mémoire (pandas.to_excel passe par des cellules
+  openpyxl stylées, coût qui croît avec le programme)
+- Cellules vides omises ; les textes restent des textes (pas de conversion en nombre,
+  URL ou formule côté xlsxwriter) : relecture identique avec pd.read_excel(dtype=str)
+- Écriture dans un fichier temporaire puis os.replace : un lecteur (GUI, watch, serve)
+  ne voit jamais un classeur à moitié écrit
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Sequence
+
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter absent : openpyxl en mode écriture seule
+    xlsxwriter = None
+
+SHEET_NAME = "Sheet1"     # nom par défaut de pandas.to_excel
+
+
+def write_rows(path, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """Écrit en-tête + lignes (valeurs dans l'ordre de columns) ; retourne le nombre de lignes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    n = 0
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(str(tmp), {"constant_memory": True, "strings_to_numbers": False,
+                                            "strings_to_formulas": False, "strings_to_urls": False})
+        ws = wb.add_worksheet(SHEET_NAME)
+        ws.write_row(0, 0, list(columns))
+        for n, row in enumerate(rows, start=1):
+            for j, v in enumerate(row):
+                if v is None or v == "":
+                    continue
+                if isinstance(v, str):
+                    ws.write_string(n, j, v)
+                else:
+                    ws.write(n, j, v)
+        wb.close()
+    else:
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(SHEET_NAME)
+        ws.append(list(columns))
+        for n, row in enumerate(rows, start=1):
+            ws.append([None if v == "" else v for v in row])
+        wb.save(tmp)
+    os.replace(tmp, path)
+    return n
+
+
+def write_dicts(path, columns: Sequence[str], records: Iterable[dict]) -> int:
+    """Lignes données sous forme de dicts (clés absentes : cellule vide)."""
+    return write_rows(path, columns, ([r.get(c) for c in columns] for r in records))